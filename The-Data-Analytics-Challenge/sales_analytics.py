@@ -0,0 +1,415 @@
+import os
+import sys
+import json
+import math
+import argparse
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+# Sales analytics (streaming version of DataAnalyticsCodeChallenge.ipynb)
+#
+# The notebook loads the whole CSV with pd.read_csv. Here the CSV is read a
+# chunk of rows at a time, and each chunk is folded into running totals, so
+# memory grows with the number of distinct items, days and totals, not with
+# the number of rows:
+#   - time of day and price tier come from np.select over whole columns
+#     instead of a Python function per row
+#   - TotalPrice is computed once and is also the revenue of step 5
+#   - item names become integer codes, and the per item, per period, per tier
+#     and per day sums are bincounts added onto the totals so far
+#   - TotalPrice quartiles stay exact: a count is kept per distinct total
+#   - with a cache directory, the parsed columns of each chunk are saved as
+#     .npz files on the first run; later runs on the same CSV read those
+#     instead of parsing the CSV again
+
+CHUNK_ROWS = 1_000_000
+COLUMNS = ["item", "price", "date", "time", "quantity"]
+PERIODS = ["Morning", "Afternoon", "Evening", "Night"]
+TIERS = ["Budget", "Mid-Range", "Premium"]
+NO_HOUR = -1                        # a time that did not parse (the notebook calls it Night)
+NO_DAY = np.iinfo(np.int32).min     # a missing date
+CACHE_FORMAT = 1
+
+# 4. Morning 6-11, Afternoon 12-16, Evening 17-20, Night the rest (codes into PERIODS)
+def time_of_day(hours):
+    return np.select([(hours >= 6) & (hours <= 11), (hours >= 12) & (hours <= 16), (hours >= 17) & (hours <= 20)],
+                     [0, 1, 2], 3).astype(np.int8)
+
+# 7. Budget up to $5.00, Mid-Range up to $20.00, Premium above (codes into TIERS)
+def price_tier(prices):
+    return np.select([prices <= 5.00, prices <= 20.00], [0, 1], 2).astype(np.int8)
+
+# There are at most 1440 distinct times, so only those are parsed
+def parse_hours(times):
+    codes, uniques = pd.factorize(times)
+    parsed = pd.to_datetime(pd.Series(uniques, dtype=object), format="%I:%M %p", errors="coerce")
+    hours = np.append(parsed.dt.hour.fillna(NO_HOUR).to_numpy(np.int8), np.int8(NO_HOUR))
+    return hours[codes]     # code -1 (missing) picks the NO_HOUR at the end
+
+def parse_days(dates):
+    days = pd.to_datetime(dates, format="%m/%d/%Y").to_numpy("datetime64[D]")
+    return np.where(np.isnat(days), NO_DAY, days.astype(np.int64)).astype(np.int32)
+
+# sums padded with zeros to `size` codes
+def grow(sums, size):
+    return np.concatenate([sums, np.zeros(size - len(sums), dtype=sums.dtype)]) if len(sums) < size else sums
+
+# Adds weights per code onto sums, growing sums to `size` codes
+def add_bins(sums, codes, weights, size):
+    return grow(sums, size) + np.bincount(codes, weights, minlength=size)
+
+# Adds weights per key onto (keys, sums); keys stay sorted and distinct
+def add_keyed(keys, sums, new_keys, weights):
+    keys, slot = np.unique(np.concatenate([keys, new_keys]), return_inverse=True)
+    return keys, np.bincount(slot, np.concatenate([sums, weights]), minlength=len(keys))
+
+# The notebook's int(str(x).split('.')[-1][-1])
+def last_digit(value):
+    text = str(value)
+    return int(text[-1]) if text[-1].isdigit() else None
+
+class SalesAnalytics:
+    def __init__(self):
+        self.rows = 0
+        self.items = []                 # item names, in the order first seen
+        self.codes = {}                 # item name -> position in items
+        self.quantity = np.zeros(0)     # per item code
+        self.revenue = np.zeros(0)
+        self.sales = np.zeros(0, dtype=np.int64)
+        self.whole_quantities = True
+        self.total_revenue = 0.0
+        self.period_rows = np.zeros(len(PERIODS), dtype=np.int64)
+        self.period_revenue = np.zeros(len(PERIODS))
+        self.tier_rows = np.zeros(len(TIERS), dtype=np.int64)
+        self.tier_revenue = np.zeros(len(TIERS))
+        self.days = np.zeros(0, dtype=np.int32)     # days since 1970-01-01
+        self.day_revenue = np.zeros(0)
+        self.totals = np.zeros(0)                   # distinct TotalPrice values
+        self.total_counts = np.zeros(0)
+        self.first_price = None
+
+    @classmethod
+    def from_csv(cls, path, chunk_rows=CHUNK_ROWS, cache=None):
+        analytics = cls()
+        for columns in analytics.scan(path, chunk_rows, cache):
+            analytics.add(columns)
+        return analytics
+
+    def set_items(self, items):
+        self.items = list(items)
+        self.codes = {name: code for code, name in enumerate(self.items)}
+
+    # Item names -> codes into self.items (-1 for a missing name)
+    def item_codes(self, names):
+        local, uniques = pd.factorize(names)
+        mapping = np.empty(len(uniques), dtype=np.int32)
+        for i, name in enumerate(uniques):
+            if name not in self.codes:
+                self.codes[name] = len(self.items)
+                self.items.append(name)
+            mapping[i] = self.codes[name]
+        codes = np.full(len(local), -1, dtype=np.int32)
+        named = local >= 0
+        codes[named] = mapping[local[named]]
+        return codes
+
+    # One chunk of the CSV as parsed columns
+    def read_frame(self, frame):
+        return {"item": self.item_codes(frame["item"]),
+                "price": frame["price"].to_numpy(np.float64),
+                "quantity": frame["quantity"].to_numpy(np.float64),
+                "whole": np.array(frame["quantity"].dtype.kind in "iu"),
+                "day": parse_days(frame["date"]),
+                "hour": parse_hours(frame["time"])}
+
+    # Parsed columns chunk by chunk, from the cache when it matches the CSV
+    def scan(self, path, chunk_rows=CHUNK_ROWS, cache=None):
+        source = {"source": os.path.abspath(path), "size": os.path.getsize(path),
+                  "mtime_ns": os.stat(path).st_mtime_ns, "format": CACHE_FORMAT}
+        manifest_path = os.path.join(cache, "manifest.json") if cache else None
+        if cache and os.path.exists(manifest_path):
+            with open(manifest_path, encoding="utf-8") as f:
+                manifest = json.load(f)
+            if all(manifest.get(key) == value for key, value in source.items()):
+                self.set_items(manifest["items"])
+                for number in range(manifest["chunks"]):
+                    with np.load(os.path.join(cache, f"chunk_{number:05d}.npz")) as chunk:
+                        yield {name: chunk[name] for name in chunk.files}
+                return
+        if cache:
+            os.makedirs(cache, exist_ok=True)
+            if os.path.exists(manifest_path):
+                os.remove(manifest_path)    # the old chunks no longer count
+        chunks = 0
+        dtypes = {"item": str, "date": str, "time": str, "price": np.float64}
+        for frame in pd.read_csv(path, usecols=COLUMNS, dtype=dtypes, chunksize=chunk_rows):
+            columns = self.read_frame(frame)
+            if cache:
+                np.savez(os.path.join(cache, f"chunk_{chunks:05d}.npz"), **columns)
+            chunks += 1
+            yield columns
+        if cache:
+            # Written last, so a run that stops half way leaves no usable cache
+            with open(manifest_path, "w", encoding="utf-8") as f:
+                json.dump(dict(source, chunks=chunks, items=self.items), f)
+
+    # Folds one chunk of parsed columns into the totals
+    def add(self, columns):
+        item, price, quantity, day = columns["item"], columns["price"], columns["quantity"], columns["day"]
+        # 2. TotalPrice, which step 5 calls revenue; sums skip missing values like pandas
+        total = quantity * price
+        known = ~np.isnan(total)
+        amount = np.where(known, total, 0.0)
+        if self.first_price is None and len(price):
+            self.first_price = float(price[0])
+        self.rows += len(item)
+        self.whole_quantities &= bool(columns["whole"])
+        self.total_revenue += float(amount.sum())
+
+        # 3. Per item
+        named = item >= 0
+        codes, size = item[named], len(self.items)
+        self.quantity = add_bins(self.quantity, codes, np.nan_to_num(quantity[named]), size)
+        self.revenue = add_bins(self.revenue, codes, amount[named], size)
+        self.sales = add_bins(self.sales, codes, None, size)
+
+        # 5. and 7. Per period of the day and per price tier
+        periods = time_of_day(columns["hour"])
+        self.period_rows += np.bincount(periods, minlength=len(PERIODS))
+        self.period_revenue += np.bincount(periods, amount, minlength=len(PERIODS))
+        tiers = price_tier(price)
+        self.tier_rows += np.bincount(tiers, minlength=len(TIERS))
+        self.tier_revenue += np.bincount(tiers, amount, minlength=len(TIERS))
+
+        # 6. and 8. Per day, and how often each TotalPrice occurs
+        dated = day != NO_DAY
+        days, slot = np.unique(day[dated], return_inverse=True)
+        self.days, self.day_revenue = add_keyed(self.days, self.day_revenue, days,
+                                                np.bincount(slot, amount[dated], minlength=len(days)))
+        totals, counts = np.unique(total[known], return_counts=True)
+        self.totals, self.total_counts = add_keyed(self.totals, self.total_counts, totals, counts.astype(np.float64))
+
+    # ---------- Results (same shapes as the notebook's) ----------
+
+    # 3. Total quantity and revenue per item, in item name order like groupby
+    def item_summary(self):
+        quantity = grow(self.quantity, len(self.items))
+        summary = pd.DataFrame({
+            "item": self.items,
+            "Total_Quantity_Sold": quantity.astype(np.int64) if self.whole_quantities else quantity,
+            "Total_Revenue": grow(self.revenue, len(self.items))})
+        return summary.sort_values("item").reset_index(drop=True)
+
+    def top_items(self, n=10):
+        return self.item_summary().sort_values(by="Total_Revenue", ascending=False).head(n)
+
+    def item_revenue(self):
+        return self.item_summary().set_index("item")["Total_Revenue"].rename("TotalPrice")
+
+    # 10. data['item'].mode()[0]: the item on the most rows, first by name on a tie
+    def most_frequent_item(self):
+        if not self.items:
+            return None
+        sales = grow(self.sales, len(self.items))
+        return min(name for name, count in zip(self.items, sales) if count == sales.max())
+
+    # 5. Revenue per period; NaN for a period with no sales, as reindex gives
+    def revenue_by_period(self):
+        revenue = np.where(self.period_rows > 0, self.period_revenue, np.nan)
+        return pd.Series(revenue, index=pd.Index(PERIODS, name="time_of_day"), name="revenue")
+
+    def tier_summary(self):
+        return pd.DataFrame({"Sales": self.tier_rows, "Revenue": self.tier_revenue},
+                            index=pd.Index(TIERS, name="price_tier"))
+
+    # 6. data['TotalPrice'].describe(), from the count of each distinct total
+    def total_price_stats(self):
+        values, counts = self.totals, self.total_counts
+        n = counts.sum()
+        stats = [n] + [np.nan] * 7
+        if n:
+            mean = (values * counts).sum() / n
+            std = math.sqrt(((values - mean) ** 2 * counts).sum() / (n - 1)) if n > 1 else np.nan
+            ends = np.cumsum(counts)    # rows up to and including each value
+
+            # Same linear interpolation as Series.quantile
+            def quantile(q):
+                h = (n - 1) * q
+                low = values[np.searchsorted(ends, math.floor(h), side="right")]
+                high = values[np.searchsorted(ends, math.ceil(h), side="right")]
+                return low + (h - math.floor(h)) * (high - low)
+
+            stats = [n, mean, std, values[0], quantile(0.25), quantile(0.5), quantile(0.75), values[-1]]
+        return pd.Series(stats, index=["count", "mean", "std", "min", "25%", "50%", "75%", "max"], name="TotalPrice")
+
+    # 8. Total sales per day
+    def daily_sales(self):
+        dates = self.days.astype(np.int64).astype("datetime64[D]").tolist()
+        return pd.Series(self.day_revenue, index=pd.Index(dates, name="date", dtype=object), name="TotalPrice")
+
+    # 9. The n items with the least revenue
+    def least_selling_items(self, n=10):
+        return self.item_revenue().sort_values().head(n).reset_index()
+
+    # 9. Total revenue before and after the least selling items get the
+    # discount and sell that much more; every other item keeps its revenue
+    def discount_impact(self, n=10, discount=0.10, boost=0.20):
+        least = self.least_selling_items(n)
+        affected = least["TotalPrice"].sum()
+        remaining = self.total_revenue - affected
+        return self.total_revenue, remaining + affected * (1 - discount) * (1 + boost)
+
+    # 10. The numbers of the little game
+    def game_numbers(self):
+        daily = self.daily_sales()
+        if daily.empty or self.most_frequent_item() is None:
+            return None
+        best_day = daily.idxmax()
+        digits = Counter(str(best_day).replace("-", ""))
+        most = max(digits.values())
+        numbers = {"best_day": best_day,
+                   "most_occurring_digits": [int(digit) for digit, count in digits.items() if count == most],
+                   "most_frequent_item": self.most_frequent_item(),
+                   "number1": last_digit(self.first_price),
+                   "number2": 1}
+        numbers["number3"] = min(numbers["most_occurring_digits"])
+        numbers["number4"] = last_digit(daily.min())
+        numbers["letters"] = len(numbers["most_frequent_item"].replace(" ", ""))
+        parts = [numbers[f"number{i}"] for i in range(1, 5)]
+        numbers["result"] = sum(parts) - numbers["letters"] if None not in parts else None
+        return numbers
+
+# 8. describe(), peak, low and IQR outlier days of the daily sales
+def daily_report(daily):
+    q1, q3 = daily.quantile(0.25), daily.quantile(0.75)
+    iqr = q3 - q1
+    return {"stats": daily.describe(),
+            "peak": daily[daily == daily.max()],
+            "low": daily[daily == daily.min()],
+            "outliers": daily[(daily < q1 - 1.5 * iqr) | (daily > q3 + 1.5 * iqr)]}
+
+# 10. data.iloc[position] with the notebook's added columns; only the CSV
+# up to that row is read
+def row_at(path, position):
+    if position < 0:
+        raise IndexError(f"row {position} is before the first row")
+    frame = pd.read_csv(path, skiprows=range(1, position + 1), nrows=1, dtype={"item": str, "date": str, "time": str})
+    if frame.empty:
+        raise IndexError(f"{path} has no row {position}")
+    row = frame.iloc[0].copy()
+    row["TotalPrice"] = row["quantity"] * row["price"]
+    row["time_of_day"] = PERIODS[time_of_day(parse_hours(frame["time"]))[0]]
+    row["price_tier"] = TIERS[price_tier(frame["price"].to_numpy(np.float64))[0]]
+    row.name = position  # the row's index in the whole file, as iloc shows it
+    return row
+
+# The notebook's three charts; needs matplotlib
+def save_plots(analytics, folder):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    os.makedirs(folder, exist_ok=True)
+    plt.figure(figsize=(8, 5))
+    analytics.revenue_by_period().plot(kind="bar", color="skyblue")
+    plt.title("Total Revenue by Time of Day")
+    plt.ylabel("Revenue ($)")
+    plt.xlabel("Time of Day")
+    plt.xticks(rotation=0)
+    plt.savefig(os.path.join(folder, "revenue_by_period.png"))
+    plt.close()
+
+    plt.figure()
+    plt.hist(analytics.totals, bins=30, weights=analytics.total_counts, color="blue", alpha=0.7)
+    plt.title("Total Price Distribution")
+    plt.xlabel("Total Price ($)")
+    plt.ylabel("Frequency")
+    plt.grid(axis="y", alpha=0.3)
+    plt.savefig(os.path.join(folder, "total_price_distribution.png"))
+    plt.close()
+
+    plt.figure(figsize=(12, 6))
+    analytics.daily_sales().plot(kind="line", marker="o", color="green")
+    plt.title("Total Sales per Day")
+    plt.xlabel("Date")
+    plt.ylabel("Total Sales ($)")
+    plt.xticks(rotation=45)
+    plt.grid(alpha=0.3)
+    plt.savefig(os.path.join(folder, "daily_sales.png"))
+    plt.close()
+
+def print_report(analytics, top=10, least=10, discount=0.10, boost=0.20, out=sys.stdout):
+    print(f"Rows: {analytics.rows}, items: {len(analytics.items)}", file=out)
+    print(f"\nTop {top} Items by Total Revenue:", file=out)
+    print(analytics.top_items(top), file=out)
+    print("\nRevenue by time of day:", file=out)
+    print(analytics.revenue_by_period(), file=out)
+    print("\nSummary of TotalPrice:", file=out)
+    print(analytics.total_price_stats(), file=out)
+    print("\nSales by price tier:", file=out)
+    print(analytics.tier_summary(), file=out)
+
+    daily = analytics.daily_sales()
+    if not daily.empty:
+        report = daily_report(daily)
+        print("\nDescriptive Statistics for Daily Total Sales:", file=out)
+        print(report["stats"], file=out)
+        print("\nPeak Sales Day(s):", file=out)
+        print(report["peak"], file=out)
+        print("\nLow Sales Day(s):", file=out)
+        print(report["low"], file=out)
+        print("\nOutlier Day(s):", file=out)
+        print(report["outliers"], file=out)
+
+    print(f"\n{least} Least Selling Items:", file=out)
+    print(analytics.least_selling_items(least), file=out)
+    original, new_total = analytics.discount_impact(least, discount, boost)
+    print(f"\nOriginal Total Revenue: $ {round(original, 2)}", file=out)
+    print(f"New Hypothetical Total Revenue after Discount: $ {round(new_total, 2)}", file=out)
+
+    game = analytics.game_numbers()
+    if game:
+        print(f"\nHighest sales date: {game['best_day']}", file=out)
+        print(f"Most occurring digits in highest sales date: {game['most_occurring_digits']}", file=out)
+        print(f"Most frequent item: {game['most_frequent_item']}", file=out)
+        print(f"Number of letters in most frequent item (no spaces): {game['letters']}", file=out)
+        for i in range(1, 5):
+            print(f"number{i}: {game[f'number{i}']}", file=out)
+        print(f"Final result (int): {game['result']}", file=out)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the data analytics notebook's analysis on a sales CSV "
+                                                 "of any size, reading it in chunks.")
+    parser.add_argument("csv", nargs="?", default="data1.csv", help="sales data (default: data1.csv)")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS,
+                        help=f"rows read at a time (default: {CHUNK_ROWS})")
+    parser.add_argument("--cache", help="folder for the parsed columns; later runs on the same CSV read it instead")
+    parser.add_argument("--top", type=int, default=10, help="items listed by highest revenue (default: 10)")
+    parser.add_argument("--least", type=int, default=10, help="least selling items given the discount (default: 10)")
+    parser.add_argument("--discount", type=float, default=0.10, help="price cut for them (default: 0.10)")
+    parser.add_argument("--boost", type=float, default=0.20, help="extra quantity they then sell (default: 0.20)")
+    parser.add_argument("--row", action="store_true", help="also show the row at the game's result index")
+    parser.add_argument("--plots", help="folder to save the notebook's charts in (needs matplotlib)")
+    args = parser.parse_args(argv)
+    if args.chunk_rows < 1:
+        parser.error("--chunk-rows must be at least 1")
+    try:
+        analytics = SalesAnalytics.from_csv(args.csv, args.chunk_rows, args.cache)
+        print_report(analytics, args.top, args.least, args.discount, args.boost)
+        game = analytics.game_numbers()
+        if args.row and game and game["result"] is not None:
+            # A negative result counts from the end, as iloc does
+            position = game["result"] + analytics.rows if game["result"] < 0 else game["result"]
+            print(f"\nRow {position}:")
+            print(row_at(args.csv, position))
+        if args.plots:
+            save_plots(analytics, args.plots)
+    except (OSError, ValueError, KeyError, IndexError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
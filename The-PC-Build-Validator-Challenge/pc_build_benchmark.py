@@ -0,0 +1,309 @@
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import tracemalloc
+from contextlib import redirect_stdout
+from datetime import datetime
+
+from pc_build_validator import (Component, BuildSummary, ResultWriter, COMPONENT_FIELDS, KIT_FIELDS, validate_build,
+                                evaluate_builds, load_inventory, iter_kits, validate_stream, print_summary,
+                                print_detailed_report)
+
+# Benchmark suite
+# Generates a seeded inventory and kit file, then times each stage of the
+# validator separately: parsing, Component construction, validation,
+# best-kit selection and report rendering. Every stage gets its best and
+# median time, kits (or components) per second and peak memory, and each
+# run is recorded in pc_build_bench.jsonl beside this script, so a change
+# can be checked against the last run on the same data.
+
+# ---------- Synthetic data ----------
+
+# Rough shares of a parts catalogue; AM5 boards only take DDR5, AM4 only DDR4
+SOCKETS = {"AM4": 0.25, "AM5": 0.35, "LGA1700": 0.40}
+BOARD_RAM = {"AM4": ["DDR4"], "AM5": ["DDR5"], "LGA1700": ["DDR4", "DDR5"]}
+# type -> (lowest price, highest price); the score follows the price
+PRICES = {"CPU": (80, 700), "Motherboard": (60, 450), "GPU": (150, 1800), "RAM": (40, 300), "PSU": (40, 250)}
+PREFIXES = {"CPU": "cpu", "Motherboard": "mobo", "GPU": "gpu", "RAM": "ram", "PSU": "psu"}
+
+# One component row (COMPONENT_FIELDS order); tier 0..1 sets price and power
+def make_part(type_, n, tier, rnd):
+    low, high = PRICES[type_]
+    cost = int(low + (high - low) * tier * rnd.uniform(0.85, 1.15))
+    score = max(1, int(cost * rnd.uniform(0.8, 1.2)))
+    if type_ == "CPU":
+        spec1 = rnd.choices(list(SOCKETS), weights=list(SOCKETS.values()))[0]
+        spec2 = str(35 + int(tier * 218))                       # TDP 35-253 W
+    elif type_ == "Motherboard":
+        spec1 = rnd.choices(list(SOCKETS), weights=list(SOCKETS.values()))[0]
+        spec2 = rnd.choice(BOARD_RAM[spec1])
+    elif type_ == "GPU":
+        spec1, spec2 = "-", str(75 + int(tier * 375))           # TDP 75-450 W
+    elif type_ == "RAM":
+        spec1, spec2 = rnd.choice(["DDR4", "DDR5"]), "-"
+    else:
+        spec1, spec2 = str(450 + 50 * int(tier * 15)), "-"      # 450-1200 W
+    return [f"{PREFIXES[type_]}_{n:04}", type_, str(score), str(cost), spec1, spec2]
+
+def generate_components(per_type, rnd):
+    return [make_part(type_, n, rnd.random(), rnd) for type_ in PRICES for n in range(1, per_type + 1)]
+
+# kind is "ok", "missing", "socket" (CPU from another socket) or
+# "budget" (compatible but too expensive); other failures (RAM type, PSU)
+# only happen by chance
+def generate_kits(count, rows, budget, mix, rnd):
+    parts = {type_: [] for type_ in PRICES}
+    for row in rows:
+        parts[row[1]].append(Component(*row))
+    cpus = {socket: [c for c in parts["CPU"] if c.socket == socket] for socket in SOCKETS}
+    rams = {ram_type: [r for r in parts["RAM"] if r.ram_type == ram_type] for ram_type in ("DDR4", "DDR5")}
+    psus = sorted(parts["PSU"], key=lambda p: p.wattage)
+    kinds = ["missing", "socket", "budget", "ok"]
+    weights = [mix["missing"], mix["socket"], mix["budget"], max(0.0, 1 - sum(mix.values()))]
+
+    def compatible():
+        mobo = rnd.choice(parts["Motherboard"])
+        cpu = rnd.choice(cpus[mobo.socket] or parts["CPU"])
+        ram = rnd.choice(rams[mobo.ram_type] or parts["RAM"])
+        gpu = rnd.choice(parts["GPU"])
+        strong = [p for p in psus if p.wattage >= cpu.tdp + gpu.tdp + 50] or psus[-1:]
+        return [cpu, mobo, gpu, ram, rnd.choice(strong)]
+
+    for n in range(1, count + 1):
+        kind = rnd.choices(kinds, weights=weights)[0]
+        # A few tries to land on the intended side of the budget
+        for _ in range(20):
+            build = compatible()
+            over = sum(part.cost for part in build) > budget
+            if over == (kind == "budget"):
+                break
+        ids = [part.component_id for part in build]
+        if kind == "socket":
+            others = [c for c in parts["CPU"] if c.socket != build[1].socket]
+            if others:
+                ids[0] = rnd.choice(others).component_id
+        elif kind == "missing":
+            slot = rnd.randrange(5)
+            ids[slot] = f"{PREFIXES[list(PRICES)[slot]]}_x{n}"
+        yield [f"kit_{n:07}"] + ids
+
+# CSV with a header row when fields are given, else space-separated lines
+def write_rows(path, rows, fields=None):
+    separator = "," if fields else " "
+    with open(path, 'w', encoding='utf-8') as f:
+        if fields:
+            f.write(separator.join(fields) + "\n")
+        for row in rows:
+            f.write(separator.join(row) + "\n")
+
+# Writes components/kits as .txt (prompt format) and .csv into folder
+def generate(folder, kits, per_type, budget, mix, seed):
+    rnd = random.Random(seed)
+    rows = generate_components(per_type, rnd)
+    kit_rows = list(generate_kits(kits, rows, budget, mix, rnd))
+    write_rows(os.path.join(folder, 'components.txt'), rows)
+    write_rows(os.path.join(folder, 'components.csv'), rows, COMPONENT_FIELDS)
+    write_rows(os.path.join(folder, 'kits.txt'), kit_rows)
+    write_rows(os.path.join(folder, 'kits.csv'), kit_rows, KIT_FIELDS)
+
+# ---------- Benchmarks ----------
+
+# Each benchmark is (name, unit, run); run() does the stage once and
+# returns how many units (kits or components) it handled. Stages work on
+# the output of the earlier ones, which is prepared untimed.
+
+def silenced(render):
+    def run():
+        with open(os.devnull, 'w', encoding='utf-8') as null, redirect_stdout(null):
+            return render()
+    return run
+
+def build_benchmarks(folder, budget, engines):
+    inventory, _ = load_inventory(os.path.join(folder, 'components.txt'))
+    kits = list(iter_kits(os.path.join(folder, 'kits.txt')))
+    rows = [[comp.component_id, comp.type, str(comp.performance_score), str(comp.cost), comp.spec1, comp.spec2]
+            for comp in inventory.values()]
+    results, best_score, best_kit = evaluate_builds(kits, inventory, budget)
+
+    def parse(name, fmt):
+        def run():
+            if name.startswith("components"):
+                return len(load_inventory(os.path.join(folder, name), fmt)[0])
+            return sum(1 for _ in iter_kits(os.path.join(folder, name), fmt))
+        return run
+
+    def construct():
+        return len({row[0]: Component(*row) for row in rows})
+
+    def validate():
+        for kit in kits:
+            validate_build(kit, inventory, budget)
+        return len(kits)
+
+    def select_best():
+        summary = BuildSummary()
+        for res in results:
+            summary.add(res["kit_id"], res["valid"], res["reasons"], res["score"])
+        return len(results)
+
+    def batch(engine):
+        def run():
+            with open(os.devnull, 'w', newline='', encoding='utf-8') as null:
+                validate_stream(iter(kits), inventory, budget, ResultWriter(null, "csv"), engine)
+            return len(kits)
+        return run
+
+    benchmarks = [
+        ("parse components (text)", "components", parse("components.txt", "text")),
+        ("parse components (csv)", "components", parse("components.csv", "csv")),
+        ("parse kits (text)", "kits", parse("kits.txt", "text")),
+        ("parse kits (csv)", "kits", parse("kits.csv", "csv")),
+        ("Component construction", "components", construct),
+        ("validate_build", "kits", validate),
+        ("best-kit selection", "kits", select_best),
+        ("evaluate_builds", "kits", lambda: len(evaluate_builds(kits, inventory, budget)[0])),
+        ("print_summary", "kits", silenced(lambda: print_summary(results, best_score, best_kit) or len(results))),
+        ("print_detailed_report", "kits",
+         silenced(lambda: print_detailed_report(results, budget, best_score, best_kit) or len(results))),
+    ]
+    benchmarks += [(f"batch csv ({engine})", "kits", batch(engine)) for engine in engines]
+    return benchmarks, results
+
+# Times one stage: `repeat` wall-clock samples (best and median are
+# reported, since a stage on a busy machine only ever runs slower), plus
+# what it allocates at its peak when `memory` is set
+def time_stage(run, repeat, memory):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        handled = run()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    timing = {"best": samples[0], "median": samples[len(samples) // 2], "handled": handled}
+    if memory:
+        tracemalloc.start()
+        try:
+            run()
+            timing["peak_kb"] = tracemalloc.get_traced_memory()[1] // 1024
+        finally:
+            tracemalloc.stop()
+    return timing
+
+def available_engines():
+    try:
+        import numpy
+        return ["scalar", "numpy"]
+    except ImportError:
+        return ["scalar"]
+
+def run_suite(kits, args):
+    folder = tempfile.mkdtemp(prefix=f"pc_bench_{kits}_")
+    try:
+        generate(folder, kits, args.parts, args.budget, args.mix, args.seed)
+        benchmarks, results = build_benchmarks(folder, args.budget, available_engines())
+        outcome = {}
+        for res in results:
+            kind = "Valid" if res["valid"] else res["reasons"][0].split(":")[0]
+            outcome[kind] = outcome.get(kind, 0) + 1
+        stages = {}
+        for name, unit, run in benchmarks:
+            if args.only and not any(word in name for word in args.only):
+                continue
+            stages[name] = dict(time_stage(run, args.repeat, args.memory), unit=unit)
+            print(f"  {name:<26} {stages[name]['best']:9.4f}s", file=sys.stderr)
+        return stages, outcome
+    finally:
+        if args.keep:
+            print(f"Data kept in {folder}", file=sys.stderr)
+        else:
+            shutil.rmtree(folder, ignore_errors=True)
+
+# ---------- Run history ----------
+
+# Runs are kept next to this script, one JSON object per line
+HISTORY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pc_build_bench.jsonl")
+
+# Runs are only compared on the same generated data
+def dataset(args, kits):
+    mix = "/".join(f"{args.mix[kind]:g}" for kind in ("missing", "socket", "budget"))
+    return f"{kits} kits, {args.parts} parts per type, budget {args.budget}, failures {mix}, seed {args.seed}"
+
+# The last recorded run on `data` (with `label`, if given), or None
+def previous_run(path, data, label=None):
+    found = None
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                run = json.loads(line) if line.strip() else None
+                if run and run["data"] == data and label in (None, run["label"]):
+                    found = run
+    return found
+
+def print_run(run, before):
+    print(f"\n{run['data']} ({run['label']})")
+    print("Kit outcomes: " + ", ".join(f"{kind} {count}" for kind, count in sorted(run["outcome"].items())))
+    header = f"{'Stage':<26} {'Best (s)':>9} {'Median (s)':>10} {'Rate':>22} {'Peak KB':>8}"
+    if before:
+        header += f" {'vs ' + before['label']:>20}"
+    print(header)
+    print("-" * len(header))
+    for name, stage in run["stages"].items():
+        rate = f"{stage['handled'] / stage['best']:,.0f} {stage['unit']}/s" if stage["best"] else "-"
+        line = f"{name:<26} {stage['best']:>9.4f} {stage['median']:>10.4f} {rate:>22} {stage.get('peak_kb', '-'):>8}"
+        if before:
+            old = before["stages"].get(name)
+            change = f"{(stage['best'] / old['best'] - 1) * 100:+.1f}%" if old and old["best"] else "-"
+            line += f" {change:>20}"
+        print(line)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time each stage of the PC Build Validator on generated parts and kits")
+    parser.add_argument("--kits", type=int, nargs="+", default=[10000, 100000],
+                        help="kit counts to run (default: 10000 100000)")
+    parser.add_argument("--parts", type=int, default=200, help="components per type (default: 200)")
+    parser.add_argument("--budget", type=int, default=2500, help="total budget (default: 2500)")
+    parser.add_argument("--missing", type=float, default=0.05, help="share of kits with a missing part (default: 0.05)")
+    parser.add_argument("--socket-mismatch", type=float, default=0.10,
+                        help="share of kits with a CPU for another socket (default: 0.10)")
+    parser.add_argument("--over-budget", type=float, default=0.15,
+                        help="share of compatible kits over the budget (default: 0.15)")
+    parser.add_argument("--seed", type=int, default=42, help="seed for the generated parts and kits (default: 42)")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs of each stage (default: 5)")
+    parser.add_argument("--no-memory", dest="memory", action="store_false",
+                        help="do not run each stage once more to record its peak allocation")
+    parser.add_argument("--only", nargs="+", help="stages to run, by any word of their name (e.g. parse batch)")
+    parser.add_argument("--history", default=HISTORY_FILE, help="where runs are recorded (default: %(default)s)")
+    parser.add_argument("--label", help="name of this run in the history (default: date and time)")
+    parser.add_argument("--compare", metavar="LABEL", help="compare with the last run of this name instead of "
+                                                          "the last run on the same data")
+    parser.add_argument("--keep", action="store_true", help="do not delete the generated component and kit files")
+    parser.add_argument("--generate", metavar="FOLDER", help="write the component and kit files to FOLDER and stop")
+    args = parser.parse_args()
+    args.mix = {"missing": args.missing, "socket": args.socket_mismatch, "budget": args.over_budget}
+    if sum(args.mix.values()) > 1 or min(args.mix.values()) < 0:
+        parser.error("--missing, --socket-mismatch and --over-budget must be shares adding up to at most 1")
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+
+    if args.generate:
+        os.makedirs(args.generate, exist_ok=True)
+        generate(args.generate, args.kits[0], args.parts, args.budget, args.mix, args.seed)
+        print(f"✅ Component and kit files written to {args.generate}")
+        sys.exit(0)
+
+    label = args.label or datetime.now().strftime("%Y-%m-%d %H:%M")
+    for kits in args.kits:
+        print(f"Validating {kits} kits against {args.parts} parts per type ...", file=sys.stderr)
+        stages, outcome = run_suite(kits, args)
+        run = {"label": label, "python": platform.python_version(), "data": dataset(args, kits),
+               "outcome": outcome, "stages": stages}
+        print_run(run, previous_run(args.history, run["data"], args.compare))
+        with open(args.history, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(run) + "\n")
+    print(f"✅ Runs recorded in {args.history}")
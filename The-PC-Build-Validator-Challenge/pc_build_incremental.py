@@ -0,0 +1,255 @@
+import sys
+import heapq
+import argparse
+from bisect import bisect_left, bisect_right, insort
+
+from pc_build_validator import (Component, BuildSummary, InputError, validate_build, load_inventory,
+                                iter_kits, print_batch_summary)
+
+# Incremental validation
+# Validates every kit once, then keeps the results current while prices,
+# scores, specs and the budget change, re-checking only the kits affected:
+#   - uses: component_id -> rows of the kits naming it (missing IDs included,
+#     so adding a component fixes its kits)
+#   - per kit: the missing-components reason, the compatibility reasons, and
+#     the total cost and score. A budget change needs no re-check at all: only
+#     kits whose cost lies between the old and new budget flip, and they are
+#     found by bisecting the sorted list of distinct kit costs.
+#   - a heap of the valid kits by (score, kit row), so the best build (first
+#     kit wins a tie, as in Step 5) and the top K need no full rescan. Entries
+#     of kits that changed are left in the heap and skipped when reached.
+
+COMPACT_SLACK = 1024    # stale heap entries tolerated beyond the live ones
+
+class IncrementalValidator:
+    def __init__(self, inventory, build_kits, total_budget):
+        self.inventory = dict(inventory)
+        self.kits = [list(kit) for kit in build_kits]
+        self.total_budget = total_budget
+        self.uses = {}
+        for row, kit in enumerate(self.kits):
+            for cid in kit[1:6]:
+                self.uses.setdefault(cid, set()).add(row)
+
+        count = len(self.kits)
+        self.missing = [None] * count   # "Missing components: ..." or None
+        self.checks = [[]] * count      # compatibility reasons, without "Over budget"
+        self.cost = [0] * count
+        self.score = [0] * count
+        self.version = [0] * count      # bumped on every change, to spot stale heap entries
+        self.valid = 0
+        self.failures = {}              # reason kind -> kits
+
+        for row in range(count):
+            self.validate(row)
+            self.count(row, 1)
+        self.rows_by_cost = {}          # total cost -> rows of kits with no missing parts
+        for row in range(count):
+            if not self.missing[row]:
+                self.rows_by_cost.setdefault(self.cost[row], set()).add(row)
+        self.costs = sorted(self.rows_by_cost)
+        self.heap = [(-self.score[row], row, 0) for row in range(count) if self.is_valid(row)]
+        heapq.heapify(self.heap)
+
+    def is_valid(self, row):
+        return not self.missing[row] and not self.checks[row] and self.cost[row] <= self.total_budget
+
+    # The reasons validate_build would give for the kit right now
+    def reasons(self, row):
+        if self.missing[row]:
+            return [self.missing[row]]
+        over = ["Over budget"] if self.cost[row] > self.total_budget else []
+        return over + self.checks[row]
+
+    def validate(self, row):
+        _, reasons, cost, score = validate_build(self.kits[row], self.inventory, self.total_budget)
+        if reasons and reasons[0].startswith("Missing components"):
+            self.missing[row], self.checks[row] = reasons[0], []
+        else:
+            self.missing[row] = None
+            self.checks[row] = [reason for reason in reasons if reason != "Over budget"]
+        self.cost[row] = cost
+        self.score[row] = score
+
+    # Adds (sign 1) or takes back (sign -1) the kit's share of the counts
+    def count(self, row, sign):
+        if self.is_valid(row):
+            self.valid += sign
+        for reason in self.reasons(row):
+            kind = reason.split(":")[0]
+            self.failures[kind] = self.failures.get(kind, 0) + sign
+
+    def forget(self, row):
+        self.count(row, -1)
+        if not self.missing[row]:
+            rows = self.rows_by_cost[self.cost[row]]
+            rows.discard(row)
+            if not rows:
+                del self.rows_by_cost[self.cost[row]]
+                self.costs.pop(bisect_left(self.costs, self.cost[row]))
+        self.version[row] += 1
+
+    def remember(self, row):
+        self.count(row, 1)
+        if not self.missing[row]:
+            if self.cost[row] not in self.rows_by_cost:
+                self.rows_by_cost[self.cost[row]] = set()
+                insort(self.costs, self.cost[row])
+            self.rows_by_cost[self.cost[row]].add(row)
+        if self.is_valid(row):
+            heapq.heappush(self.heap, (-self.score[row], row, self.version[row]))
+
+    def recheck(self, rows):
+        for row in rows:
+            self.forget(row)
+            self.validate(row)
+            self.remember(row)
+        if len(self.heap) > 2 * self.valid + COMPACT_SLACK:
+            self.heap = [entry for entry in self.heap if entry[2] == self.version[entry[1]]]
+            heapq.heapify(self.heap)
+        return len(rows)
+
+    # ---------- Updates (each returns how many kits were re-checked) ----------
+
+    # Adds a component or replaces it (any field, including its type)
+    def set_component(self, comp):
+        self.inventory[comp.component_id] = comp
+        return self.recheck(self.uses.get(comp.component_id, ()))
+
+    def update_component(self, component_id, cost=None, performance_score=None, spec1=None, spec2=None):
+        old = self.inventory.get(component_id)
+        if old is None:
+            raise ValueError(f"no component {component_id}")
+        return self.set_component(Component(
+            component_id, old.type,
+            old.performance_score if performance_score is None else performance_score,
+            old.cost if cost is None else cost,
+            old.spec1 if spec1 is None else spec1,
+            old.spec2 if spec2 is None else spec2))
+
+    def remove_component(self, component_id):
+        if component_id not in self.inventory:
+            raise ValueError(f"no component {component_id}")
+        del self.inventory[component_id]
+        return self.recheck(self.uses.get(component_id, ()))
+
+    def set_budget(self, total_budget):
+        low, high = sorted((self.total_budget, total_budget))
+        # Only kits with low < cost <= high change sides
+        start = bisect_right(self.costs, low)
+        end = bisect_right(self.costs, high)
+        rows = [row for cost in self.costs[start:end] for row in self.rows_by_cost[cost]]
+        for row in rows:
+            self.count(row, -1)
+            self.version[row] += 1
+        self.total_budget = total_budget
+        for row in rows:
+            self.count(row, 1)
+            if self.is_valid(row):
+                heapq.heappush(self.heap, (-self.score[row], row, self.version[row]))
+        return len(rows)
+
+    # ---------- Results ----------
+
+    # (kit_id, score) of the K best valid kits, best first
+    def top(self, k):
+        found = []
+        while self.heap and len(found) < k:
+            entry = heapq.heappop(self.heap)
+            if entry[2] == self.version[entry[1]]:
+                found.append(entry)
+        for entry in found:
+            heapq.heappush(self.heap, entry)
+        return [(self.kits[row][0], -neg_score) for neg_score, row, _ in found]
+
+    # Same best score / best kit as the Step 5 loop
+    def best(self):
+        top = self.top(1)
+        if top and top[0][1] > 0:
+            return top[0][1], top[0][0]
+        return 0, "NONE"
+
+    def summary(self):
+        summary = BuildSummary()
+        summary.best_score, summary.best_kit = self.best()
+        summary.kits = len(self.kits)
+        summary.valid = self.valid
+        summary.failures = {kind: count for kind, count in self.failures.items() if count}
+        return summary
+
+    # Same list of dicts as evaluate_builds
+    def results(self):
+        return [{"kit_id": kit[0], "valid": self.is_valid(row), "reasons": self.reasons(row),
+                 "cost": self.cost[row], "score": self.score[row]}
+                for row, kit in enumerate(self.kits)]
+
+# ---------- Update commands ----------
+
+COMMANDS = """Commands (one per line):
+  set <component_id> <type> <performance_score> <cost> <spec1> <spec2>   add or replace a component
+  cost <component_id> <cost>          score <component_id> <performance_score>
+  spec <component_id> <spec1> <spec2> remove <component_id>
+  budget <total_budget>               best [K]
+  summary                             help"""
+
+def run_command(validator, line, out=sys.stdout):
+    words = line.split()
+    if not words:
+        return
+    command, args = words[0].lower(), words[1:]
+    if command == "set" and len(args) == 6:
+        checked = validator.set_component(Component(*args))
+    elif command == "cost" and len(args) == 2:
+        checked = validator.update_component(args[0], cost=args[1])
+    elif command == "score" and len(args) == 2:
+        checked = validator.update_component(args[0], performance_score=args[1])
+    elif command == "spec" and len(args) == 3:
+        checked = validator.update_component(args[0], spec1=args[1], spec2=args[2])
+    elif command == "remove" and len(args) == 1:
+        checked = validator.remove_component(args[0])
+    elif command == "budget" and len(args) == 1:
+        checked = validator.set_budget(int(args[0]))
+    elif command == "best" and len(args) <= 1:
+        for rank, (kit_id, score) in enumerate(validator.top(int(args[0]) if args else 5), start=1):
+            print(f"#{rank}: {kit_id} (Score {score})", file=out)
+        return
+    elif command == "summary" and not args:
+        print_batch_summary(validator.summary(), out)
+        return
+    elif command == "help":
+        print(COMMANDS, file=out)
+        return
+    else:
+        raise ValueError(f"unknown command: {line.strip()} (try help)")
+    best_score, best_kit = validator.best()
+    print(f"✅ {checked} kits re-checked. Best Build: {best_kit} (Score {best_score})", file=out)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Validate PC build kits once, then apply price, spec and budget "
+                                                 "updates read from standard input, re-checking only affected kits.")
+    parser.add_argument("--budget", type=int, required=True, help="total budget in dollars")
+    parser.add_argument("--components", required=True, help="component file (.csv, .jsonl or space-separated text)")
+    parser.add_argument("--kits", required=True, help="build kit file")
+    parser.add_argument("--input-format", choices=["csv", "jsonl", "text"],
+                        help="format of both input files (default: from the file extension)")
+    parser.add_argument("--skip-invalid", action="store_true", help="report bad rows and carry on instead of stopping")
+    args = parser.parse_args(argv)
+    try:
+        inventory, skipped = load_inventory(args.components, args.input_format, args.skip_invalid)
+        kits = list(iter_kits(args.kits, args.input_format, args.skip_invalid))
+    except (InputError, OSError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+    validator = IncrementalValidator(inventory, kits, args.budget)
+    print_batch_summary(validator.summary(), sys.stdout, skipped)
+    if sys.stdin.isatty():
+        print(COMMANDS)
+    for line in sys.stdin:
+        try:
+            run_command(validator, line)
+        except ValueError as e:
+            print(f"❌ {e}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,252 @@
+import sys
+import argparse
+from bisect import bisect_right, insort
+
+from pc_build_validator import InputError, load_inventory
+
+# Best-build search
+# Instead of checking kits someone already put together, find the top K
+# compatible builds (one CPU, Motherboard, GPU, RAM and PSU, passing every
+# check in validate_build) that fit in the budget.
+#
+# Step 1: keep only parts that can take part in a build (a CPU whose socket
+#         some motherboard has, RAM of a type some motherboard takes).
+# Step 2: drop dominated parts. Within a group of interchangeable parts
+#         (CPUs with the same socket, motherboards with the same socket and
+#         RAM type, RAM of the same type) a part is dropped once K others cost
+#         no more, score no less and need no more power (or, for a PSU, give
+#         no less wattage): each of those K gives a build at least as good.
+# Step 3: branch and bound, Motherboard -> CPU -> RAM -> GPU -> PSU. Every
+#         list is tried best score first. The remaining slots are bounded by
+#         their combined cost/score frontier (a DP over cost: best score for
+#         each amount of money), and a branch stops as soon as the money left
+#         cannot buy a finish that beats the K-th build found so far.
+#
+# Builds are ranked by score (high first), then cost (low first), then the
+# component IDs in kit order, so the result does not depend on input order.
+
+PSU_HEADROOM = 50   # same rule as validate_build: wattage >= CPU TDP + GPU TDP + 50
+
+# Key that sorts parts best first inside a slot
+def by_score(comp):
+    return (-comp.performance_score, comp.cost, comp.component_id)
+
+# need(comp) is a value where lower is better (TDP, or minus the wattage);
+# parts are only compared with others in the same group(comp)
+def prune_dominated(parts, top_k, group=lambda comp: None, need=lambda comp: 0):
+    kept = []
+    rivals_by_group = {}
+    for comp in sorted(parts, key=lambda c: (c.cost, -c.performance_score, need(c), c.component_id)):
+        rivals = rivals_by_group.setdefault(group(comp), [])
+        better = 0
+        for other in rivals:
+            # Earlier parts cost no more; a rival must also score no less, need
+            # no more and rank ahead (so a tie on cost and score goes by ID)
+            if (other.performance_score >= comp.performance_score and need(other) <= need(comp)
+                    and by_score(other) < by_score(comp)):
+                better += 1
+                if better == top_k:
+                    break
+        if better < top_k:
+            rivals.append(comp)
+            kept.append(comp)
+    return kept
+
+# Cost/score Pareto frontier: the best score reachable for at most each
+# cost. Adding two frontiers gives the frontier of buying one item from
+# each, which is how the bounds for several slots at once are built.
+class Frontier:
+    def __init__(self, points):
+        self.costs = []
+        self.scores = []
+        for cost, score in sorted(points, key=lambda point: (point[0], -point[1])):
+            if not self.scores or score > self.scores[-1]:
+                self.costs.append(cost)
+                self.scores.append(score)
+        self.max_score = self.scores[-1] if self.scores else None
+
+    @classmethod
+    def of_parts(cls, parts):
+        return cls((comp.cost, comp.performance_score) for comp in parts)
+
+    def __add__(self, other):
+        return Frontier((cost + other_cost, score + other_score)
+                        for cost, score in zip(self.costs, self.scores)
+                        for other_cost, other_score in zip(other.costs, other.scores))
+
+    # Best score for at most `money`, or None when nothing is that cheap
+    def best_within(self, money):
+        i = bisect_right(self.costs, money)
+        return self.scores[i - 1] if i else None
+
+class BuildSearch:
+    def __init__(self, inventory, total_budget, top_k=5):
+        self.total_budget = total_budget
+        self.top_k = top_k
+        self.top = []           # (-score, cost, ids, parts), best first
+        self.nodes = 0          # partial builds looked at
+
+        parts = {type_: [] for type_ in ("CPU", "Motherboard", "GPU", "RAM", "PSU")}
+        for comp in inventory.values():
+            if comp.type in parts:
+                parts[comp.type].append(comp)
+
+        # Step 1: parts that fit some motherboard
+        sockets = {mobo.socket for mobo in parts["Motherboard"]}
+        ram_types = {mobo.ram_type for mobo in parts["Motherboard"]}
+        cpus = [cpu for cpu in parts["CPU"] if cpu.socket in sockets]
+        rams = [ram for ram in parts["RAM"] if ram.ram_type in ram_types]
+
+        # Step 2: dominated parts
+        self.counts = {type_: len(found) for type_, found in parts.items()}
+        mobos = prune_dominated(parts["Motherboard"], top_k, group=lambda c: (c.socket, c.ram_type))
+        cpus = prune_dominated(cpus, top_k, group=lambda c: c.socket, need=lambda c: c.tdp)
+        rams = prune_dominated(rams, top_k, group=lambda c: c.ram_type)
+        gpus = prune_dominated(parts["GPU"], top_k, need=lambda c: c.tdp)
+        psus = prune_dominated(parts["PSU"], top_k, need=lambda c: -c.wattage)
+        self.kept = {"CPU": len(cpus), "Motherboard": len(mobos), "GPU": len(gpus), "RAM": len(rams), "PSU": len(psus)}
+
+        self.mobos = sorted(mobos, key=by_score)
+        self.cpus = {}
+        for cpu in sorted(cpus, key=by_score):
+            self.cpus.setdefault(cpu.socket, []).append(cpu)
+        self.rams = {}
+        for ram in sorted(rams, key=by_score):
+            self.rams.setdefault(ram.ram_type, []).append(ram)
+        self.gpus = sorted(gpus, key=by_score)
+        self.psus = sorted(psus, key=by_score)
+
+        # Bounds for the slots still to fill below each level (compatibility
+        # is left out, so they never under-estimate)
+        self.psu_rest = Frontier.of_parts(self.psus)
+        self.gpu_rest = Frontier.of_parts(self.gpus) + self.psu_rest
+        self.ram_rest = {}      # RAM type -> RAM + GPU + PSU
+        self.cpu_rest = {}      # (socket, RAM type) -> CPU + RAM + GPU + PSU
+
+    def worst_score(self):
+        return -self.top[-1][0] if len(self.top) == self.top_k else None
+
+    # Whether some way of filling the remaining slots (frontier `rest`) on
+    # top of a partial build can still make the top K
+    def promising(self, rest, score, cost):
+        best = rest.best_within(self.total_budget - cost)
+        if best is None:
+            return False
+        if len(self.top) < self.top_k:
+            return True
+        worst_score, worst_cost = -self.top[-1][0], self.top[-1][1]
+        if score + best != worst_score:
+            return score + best > worst_score
+        # Only a tie on score is left, which must not cost more
+        best = rest.best_within(worst_cost - cost)
+        return best is not None and score + best >= worst_score
+
+    def add(self, build):
+        score = sum(comp.performance_score for comp in build)
+        cost = sum(comp.cost for comp in build)
+        entry = (-score, cost, tuple(comp.component_id for comp in build), build)
+        if len(self.top) < self.top_k or entry[:3] < self.top[-1][:3]:
+            insort(self.top, entry, key=lambda e: e[:3])
+            del self.top[self.top_k:]
+
+    # Tries `choices` (best score first) for one slot on top of a partial
+    # build; rest is the frontier of the slots still to fill
+    def branch(self, choices, score, cost, rest, fill):
+        if rest.max_score is None:
+            return
+        for comp in choices:
+            worst = self.worst_score()
+            if worst is not None and score + comp.performance_score + rest.max_score < worst:
+                break   # every later choice scores no more than this one
+            if self.promising(rest, score + comp.performance_score, cost + comp.cost):
+                self.nodes += 1
+                fill(comp, score + comp.performance_score, cost + comp.cost)
+
+    def run(self):
+        if self.top_k < 1:
+            return []
+        for mobo in self.mobos:
+            if mobo.socket not in self.cpus or mobo.ram_type not in self.rams:
+                continue
+            group = (mobo.socket, mobo.ram_type)
+            if group not in self.cpu_rest:
+                self.cpu_rest[group] = Frontier.of_parts(self.cpus[mobo.socket]) + self.rest_after_cpu(mobo)
+            self.branch([mobo], 0, 0, self.cpu_rest[group],
+                        lambda mobo, score, cost: self.pick_cpu(mobo, score, cost))
+        return [{"rank": rank, "score": -entry[0], "cost": entry[1], "parts": entry[3]}
+                for rank, entry in enumerate(self.top, start=1)]
+
+    def rest_after_cpu(self, mobo):
+        if mobo.ram_type not in self.ram_rest:
+            self.ram_rest[mobo.ram_type] = Frontier.of_parts(self.rams[mobo.ram_type]) + self.gpu_rest
+        return self.ram_rest[mobo.ram_type]
+
+    def pick_cpu(self, mobo, score, cost):
+        self.branch(self.cpus[mobo.socket], score, cost, self.rest_after_cpu(mobo),
+                    lambda cpu, score, cost: self.pick_ram(mobo, cpu, score, cost))
+
+    def pick_ram(self, mobo, cpu, score, cost):
+        self.branch(self.rams[mobo.ram_type], score, cost, self.gpu_rest,
+                    lambda ram, score, cost: self.pick_gpu(mobo, cpu, ram, score, cost))
+
+    def pick_gpu(self, mobo, cpu, ram, score, cost):
+        self.branch(self.gpus, score, cost, self.psu_rest,
+                    lambda gpu, score, cost: self.pick_psu(mobo, cpu, ram, gpu, score, cost))
+
+    def pick_psu(self, mobo, cpu, ram, gpu, score, cost):
+        needed = cpu.tdp + gpu.tdp + PSU_HEADROOM
+        money = self.total_budget - cost
+        for psu in self.psus:
+            worst = self.worst_score()
+            if worst is not None and score + psu.performance_score < worst:
+                break
+            if psu.cost <= money and psu.wattage >= needed:
+                self.add((cpu, mobo, gpu, ram, psu))
+
+def find_best_builds(inventory, total_budget, top_k=5):
+    return BuildSearch(inventory, total_budget, top_k).run()
+
+def print_builds(builds, out=sys.stdout):
+    if not builds:
+        print("No compatible build fits the budget.", file=out)
+        return
+    for build in builds:
+        cpu, mobo, gpu, ram, psu = build["parts"]
+        print(f"#{build['rank']}: Score {build['score']}, Cost ${build['cost']} - CPU: {cpu.component_id}, "
+              f"Motherboard: {mobo.component_id}, GPU: {gpu.component_id}, RAM: {ram.component_id}, "
+              f"PSU: {psu.component_id}", file=out)
+
+# Writes the builds as a kit file (text format) that batch mode can re-check
+def write_kits(builds, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        for build in builds:
+            cpu, mobo, gpu, ram, psu = build["parts"]
+            f.write(f"BEST{build['rank']} {cpu.component_id} {mobo.component_id} {gpu.component_id} "
+                    f"{ram.component_id} {psu.component_id}\n")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find the best-scoring compatible PC builds within a budget.")
+    parser.add_argument("--budget", type=int, required=True, help="total budget in dollars")
+    parser.add_argument("--components", required=True, help="component file (.csv, .jsonl or space-separated text)")
+    parser.add_argument("--input-format", choices=["csv", "jsonl", "text"],
+                        help="format of the component file (default: from the file extension)")
+    parser.add_argument("--top", type=int, default=5, help="number of builds to list (default: 5)")
+    parser.add_argument("--kits-out", help="also write the builds as a kit file for batch mode")
+    parser.add_argument("--skip-invalid", action="store_true", help="report bad rows and carry on instead of stopping")
+    args = parser.parse_args(argv)
+    try:
+        inventory, skipped = load_inventory(args.components, args.input_format, args.skip_invalid)
+        search = BuildSearch(inventory, args.budget, args.top)
+        builds = search.run()
+        if args.kits_out:
+            write_kits(builds, args.kits_out)
+    except (InputError, OSError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+    print_builds(builds)
+    kept = ", ".join(f"{type_} {search.kept[type_]}/{search.counts[type_]}" for type_ in search.kept)
+    print(f"Parts searched after pruning: {kept}; partial builds tried: {search.nodes}", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
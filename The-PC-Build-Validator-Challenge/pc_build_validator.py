@@ -1,5 +1,15 @@
-# Step 1: Print user manual reference before input
-print("Please refer to the user manual for input format and syntax before entering data.\n")
+import io
+import os
+import csv
+import sys
+import json
+import stat
+import argparse
+import tempfile
+import multiprocessing
+from collections import deque
+from functools import partial
+from itertools import chain
 
 # Step 2: Define Component classes and store in dictionary
 class Component:
@@ -27,44 +37,45 @@ class Component:
             self.wattage = int(spec1)
 
 # Step 3: Collect user input with confirmation
-while True:
-    total_budget = int(input("Enter total budget: "))
-    num_components = int(input("Enter number of components: "))
+def collect_input():
+    while True:
+        total_budget = int(input("Enter total budget: "))
+        num_components = int(input("Enter number of components: "))
 
-    inventory = {}
-    for _ in range(num_components):
-        line = input("Enter component (component_id type performance_score cost spec1 spec2): ").split()
-        comp_id, comp_type, perf, cost, spec1, spec2 = line
-        inventory[comp_id] = Component(comp_id, comp_type, perf, cost, spec1, spec2)
-
-    num_kits = int(input("Enter number of build kits: "))
-    build_kits = []
-    for _ in range(num_kits):
-        line = input("Enter build kit (kit_id cpu_id mobo_id gpu_id ram_id psu_id): ").split()
-        build_kits.append(line)
-
-    # Print input summary for user verification
-    print("\n--- Current Inventory & Build Kits ---")
-    print(f"{'Field':<25} {'Value'}")
-    print(f"{'Total Budget':<25} {total_budget}")
-    print(f"{'Number of Components':<25} {num_components}")
-
-    print("\nComponents:")
-    for comp in inventory.values():
-        print(f"{comp.component_id:<10} {comp.type:<12} Score:{comp.performance_score:<5} Cost:{comp.cost:<5} Spec1:{comp.spec1:<8} Spec2:{comp.spec2}")
-
-    print(f"\nNumber of Build Kits: {num_kits}")
-    for kit in build_kits:
-        print(f"Kit ID: {kit[0]}, CPU: {kit[1]}, Motherboard: {kit[2]}, GPU: {kit[3]}, RAM: {kit[4]}, PSU: {kit[5]}")
-    print("\n--- End of Input ---\n")
+        inventory = {}
+        for _ in range(num_components):
+            line = input("Enter component (component_id type performance_score cost spec1 spec2): ").split()
+            comp_id, comp_type, perf, cost, spec1, spec2 = line
+            inventory[comp_id] = Component(comp_id, comp_type, perf, cost, spec1, spec2)
+
+        num_kits = int(input("Enter number of build kits: "))
+        build_kits = []
+        for _ in range(num_kits):
+            line = input("Enter build kit (kit_id cpu_id mobo_id gpu_id ram_id psu_id): ").split()
+            build_kits.append(line)
+
+        # Print input summary for user verification
+        print("\n--- Current Inventory & Build Kits ---")
+        print(f"{'Field':<25} {'Value'}")
+        print(f"{'Total Budget':<25} {total_budget}")
+        print(f"{'Number of Components':<25} {num_components}")
+
+        print("\nComponents:")
+        for comp in inventory.values():
+            print(f"{comp.component_id:<10} {comp.type:<12} Score:{comp.performance_score:<5} Cost:{comp.cost:<5} Spec1:{comp.spec1:<8} Spec2:{comp.spec2}")
+
+        print(f"\nNumber of Build Kits: {num_kits}")
+        for kit in build_kits:
+            print(f"Kit ID: {kit[0]}, CPU: {kit[1]}, Motherboard: {kit[2]}, GPU: {kit[3]}, RAM: {kit[4]}, PSU: {kit[5]}")
+        print("\n--- End of Input ---\n")
 
-    proceed = input("Do you want to proceed with this input? (Y/N): ").strip().upper()
-    if proceed == "Y":
-        break
-    print("Please re-enter the input.\n")
+        proceed = input("Do you want to proceed with this input? (Y/N): ").strip().upper()
+        if proceed == "Y":
+            return total_budget, inventory, build_kits
+        print("Please re-enter the input.\n")
 
 # Step 4: Build validation function
-def validate_build(build):
+def validate_build(build, inventory, total_budget):
     kit_id, cpu_id, mobo_id, gpu_id, ram_id, psu_id = build
     reasons = []
     valid = True
@@ -106,61 +117,386 @@ def validate_build(build):
     return valid, reasons, total_cost, total_score
 
 # Step 5: Evaluate all builds
-results = []
-best_score = 0
-best_kit = "NONE"
-
-for kit in build_kits:
-    valid, reasons, cost, score = validate_build(kit)
-    results.append({
-        "kit_id": kit[0],
-        "valid": valid,
-        "reasons": reasons,
-        "cost": cost,
-        "score": score
-    })
-    if valid and score > best_score:
-        best_score = score
-        best_kit = kit[0]
+# Keeps the best valid kit (first one wins a tie) and how many kits failed
+# each kind of check
+class BuildSummary:
+    def __init__(self):
+        self.best_score = 0
+        self.best_kit = "NONE"
+        self.kits = 0
+        self.valid = 0
+        self.failures = {}  # reason kind -> kits
 
-# Step 6: Print summary results first
-print(f"\nMaximum Score: {best_score}")
-print(f"Best Build: {best_kit}")
+    def add(self, kit_id, valid, reasons, score):
+        self.kits += 1
+        if valid:
+            self.valid += 1
+        for reason in reasons:
+            kind = reason.split(":")[0]
+            self.failures[kind] = self.failures.get(kind, 0) + 1
+        if valid and score > self.best_score:
+            self.best_score = score
+            self.best_kit = kit_id
+
+    # Adds the summary of the kits that came right after this one's, giving
+    # the same result as one summary over both
+    def merge(self, other):
+        self.kits += other.kits
+        self.valid += other.valid
+        for kind, count in other.failures.items():
+            self.failures[kind] = self.failures.get(kind, 0) + count
+        if other.best_score > self.best_score:
+            self.best_score = other.best_score
+            self.best_kit = other.best_kit
 
-for res in results:
-    if not res["valid"]:
-        print(f"Build {res['kit_id']} failed: {', '.join(res['reasons'])}")
-    elif res["kit_id"] != best_kit:
-        print(f"Build {res['kit_id']} passed: Score is less than {best_kit}")
+def evaluate_builds(build_kits, inventory, total_budget):
+    results = []
+    summary = BuildSummary()
+    for kit in build_kits:
+        valid, reasons, cost, score = validate_build(kit, inventory, total_budget)
+        results.append({
+            "kit_id": kit[0],
+            "valid": valid,
+            "reasons": reasons,
+            "cost": cost,
+            "score": score
+        })
+        summary.add(kit[0], valid, reasons, score)
+    return results, summary.best_score, summary.best_kit
+
+# Step 6: Print summary results first
+def print_summary(results, best_score, best_kit):
+    print(f"\nMaximum Score: {best_score}")
+    print(f"Best Build: {best_kit}")
 
-# Ask if user wants detailed report
-choice = input("\nDo you want to proceed with detailed report? (Y/N): ").strip().upper()
-if choice != "Y":
-    print("Exiting program. Goodbye!")
-    exit()
+    for res in results:
+        if not res["valid"]:
+            print(f"Build {res['kit_id']} failed: {', '.join(res['reasons'])}")
+        elif res["kit_id"] != best_kit:
+            print(f"Build {res['kit_id']} passed: Score is less than {best_kit}")
 
 # Step 7: Detailed structured report
-print("\nDetailed PC Build Validator Report\n")
-
-print("Budget Check:")
-for res in results:
-    status = "✅" if res["cost"] <= total_budget else "❌"
-    print(f"{res['kit_id']}: {res['cost']} (under {total_budget}) {status}")
-
-print("\nCompatibility Check:")
-for res in results:
-    if not res["valid"]:
-        print(f"{res['kit_id']} fails: {', '.join(res['reasons'])} ❌")
-    else:
-        print(f"{res['kit_id']} passes all checks ✅")
-
-print("\nPerformance Score:")
-for res in results:
-    note = ""
-    if not res["valid"]:
-        note = "(ignored due to incompatibility)"
-    elif res["kit_id"] == best_kit:
-        note = "✅ (best build)"
-    print(f"{res['kit_id']}: {res['score']} {note}")
-
-print(f"\nWinner: {best_kit} with {best_score} points.")
+def print_detailed_report(results, total_budget, best_score, best_kit):
+    print("\nDetailed PC Build Validator Report\n")
+
+    print("Budget Check:")
+    for res in results:
+        status = "✅" if res["cost"] <= total_budget else "❌"
+        print(f"{res['kit_id']}: {res['cost']} (under {total_budget}) {status}")
+
+    print("\nCompatibility Check:")
+    for res in results:
+        if not res["valid"]:
+            print(f"{res['kit_id']} fails: {', '.join(res['reasons'])} ❌")
+        else:
+            print(f"{res['kit_id']} passes all checks ✅")
+
+    print("\nPerformance Score:")
+    for res in results:
+        note = ""
+        if not res["valid"]:
+            note = "(ignored due to incompatibility)"
+        elif res["kit_id"] == best_kit:
+            note = "✅ (best build)"
+        print(f"{res['kit_id']}: {res['score']} {note}")
+
+    print(f"\nWinner: {best_kit} with {best_score} points.")
+
+def run_interactive():
+    # Step 1: Print user manual reference before input
+    print("Please refer to the user manual for input format and syntax before entering data.\n")
+    total_budget, inventory, build_kits = collect_input()
+    results, best_score, best_kit = evaluate_builds(build_kits, inventory, total_budget)
+    print_summary(results, best_score, best_kit)
+
+    # Ask if user wants detailed report
+    choice = input("\nDo you want to proceed with detailed report? (Y/N): ").strip().upper()
+    if choice != "Y":
+        print("Exiting program. Goodbye!")
+        return
+    print_detailed_report(results, total_budget, best_score, best_kit)
+
+# Batch mode: validate kits from files without any prompts
+# Components and kits can come from:
+#   .csv    with a header row naming the fields below (or no header, fields in that order)
+#   .jsonl  one JSON object per line with those keys (or a JSON array of the values)
+#   other   the same space-separated lines the interactive prompts take
+# Kits are streamed: each one is validated and its result written straight
+# away, so memory use does not grow with the number of kits.
+
+COMPONENT_FIELDS = ["component_id", "type", "performance_score", "cost", "spec1", "spec2"]
+KIT_FIELDS = ["kit_id", "cpu_id", "mobo_id", "gpu_id", "ram_id", "psu_id"]
+RESULT_FIELDS = ["kit_id", "valid", "cost", "score", "reasons"]
+OUTPUT_FORMATS = ["csv", "jsonl"]
+ENGINES = ["auto", "numpy", "scalar"]
+
+class InputError(Exception):
+    pass
+
+def open_input(path):
+    if path == "-":
+        return sys.stdin
+    return open(path, 'r', newline='', encoding='utf-8')
+
+def file_format(path, default="text"):
+    lowered = path.lower()
+    if lowered.endswith(".csv"):
+        return "csv"
+    if lowered.endswith((".jsonl", ".ndjson", ".json")):
+        return "jsonl"
+    return default
+
+# Yields (line number, [values in `fields` order])
+def read_records(path, fields, fmt=None):
+    fmt = fmt or file_format(path)
+    with open_input(path) as f:
+        if fmt == "csv":
+            rows = csv.reader(f)
+            header = next(rows, None)
+            if header is None:
+                return
+            header = [name.strip() for name in header]
+            if fields[0] in header:
+                missing = [name for name in fields if name not in header]
+                if missing:
+                    raise InputError(f"{path}: header is missing {', '.join(missing)}")
+                order = [header.index(name) for name in fields]
+                for line_no, row in enumerate(rows, start=2):
+                    if row:
+                        try:
+                            yield line_no, [row[i].strip() for i in order]
+                        except IndexError:
+                            yield line_no, row
+            else:
+                yield 1, header
+                for line_no, row in enumerate(rows, start=2):
+                    if row:
+                        yield line_no, [value.strip() for value in row]
+        elif fmt == "jsonl":
+            for line_no, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    raise InputError(f"{path} line {line_no}: not valid JSON")
+                if isinstance(record, dict):
+                    record = [record.get(name) for name in fields]
+                elif not isinstance(record, list):
+                    raise InputError(f"{path} line {line_no}: expected a JSON object or array")
+                yield line_no, ["-" if value is None else str(value) for value in record]
+        else:
+            for line_no, line in enumerate(f, start=1):
+                values = line.split()
+                if values:
+                    yield line_no, values
+
+# Builds the inventory dict; bad rows raise InputError, or with skip_invalid
+# are reported on stderr and left out
+def load_inventory(path, fmt=None, skip_invalid=False):
+    inventory = {}
+    skipped = 0
+    for line_no, values in read_records(path, COMPONENT_FIELDS, fmt):
+        try:
+            if len(values) != len(COMPONENT_FIELDS):
+                raise ValueError(f"expected {len(COMPONENT_FIELDS)} fields, got {len(values)}")
+            inventory[values[0]] = Component(*values)
+        except ValueError as e:
+            if not skip_invalid:
+                raise InputError(f"{path} line {line_no}: {e}")
+            print(f"❌ {path} line {line_no}: {e} (skipped)", file=sys.stderr)
+            skipped += 1
+    return inventory, skipped
+
+def iter_kits(path, fmt=None, skip_invalid=False):
+    for line_no, values in read_records(path, KIT_FIELDS, fmt):
+        if len(values) != len(KIT_FIELDS):
+            message = f"{path} line {line_no}: expected {len(KIT_FIELDS)} fields, got {len(values)}"
+            if not skip_invalid:
+                raise InputError(message)
+            print(f"❌ {message} (skipped)", file=sys.stderr)
+            continue
+        yield values
+
+class ResultWriter:
+    def __init__(self, out, fmt, header=True):
+        self.out = out
+        self.fmt = fmt
+        if fmt == "csv":
+            self.writer = csv.writer(out)
+            if header:
+                self.writer.writerow(RESULT_FIELDS)
+
+    def write(self, kit_id, valid, reasons, cost, score):
+        if self.fmt == "csv":
+            self.writer.writerow([kit_id, "Y" if valid else "N", cost, score, "; ".join(reasons)])
+        else:
+            self.out.write(json.dumps({"kit_id": kit_id, "valid": valid, "cost": cost, "score": score,
+                                       "reasons": reasons}) + "\n")
+
+# "numpy" runs the checks in array passes (pc_build_vector.py) with the same
+# results; "auto" uses it when NumPy is installed and the values fit in int64.
+# Returns the engine's inventory arrays, or None for the plain loop.
+def load_arrays(inventory, engine):
+    if engine == "scalar":
+        return None
+    try:
+        import pc_build_vector
+        return pc_build_vector.InventoryArrays(inventory)
+    except (ImportError, OverflowError) as e:
+        if engine == "numpy":
+            raise InputError(f"NumPy engine unavailable: {e}")
+        return None
+
+def validate_stream(kits, inventory, total_budget, writer=None, engine="scalar", arrays=None):
+    summary = BuildSummary()
+    arrays = arrays or load_arrays(inventory, engine)
+    if arrays:
+        import pc_build_vector
+        return pc_build_vector.validate_stream(kits, arrays, total_budget, summary, writer)
+    for kit in kits:
+        valid, reasons, cost, score = validate_build(kit, inventory, total_budget)
+        if writer:
+            writer.write(kit[0], valid, reasons, cost, score)
+        summary.add(kit[0], valid, reasons, score)
+    return summary
+
+# ---------- Parallel batch mode ----------
+# The kit stream is cut into shards that a process pool validates. Each
+# worker gets the inventory once, when it starts, as a list of plain tuples
+# (on Linux the forked workers simply inherit it); a task only carries its
+# shard of kits. Workers also format their result rows, and shards are
+# written and merged strictly in input order, so the output file, failure
+# counts and best kit (first kit wins a tie) match a single-process run.
+
+SHARD_SIZE = 20000      # kits per task
+
+WORKER = {}
+
+def init_worker(rows, total_budget, fmt, engine):
+    inventory = {row[0]: Component(*row) for row in rows}
+    WORKER.update(inventory=inventory, total_budget=total_budget, fmt=fmt,
+                  arrays=load_arrays(inventory, engine))
+
+def check_shard(kits):
+    out = io.StringIO()
+    writer = ResultWriter(out, WORKER["fmt"], header=False) if WORKER["fmt"] else None
+    summary = validate_stream(kits, WORKER["inventory"], WORKER["total_budget"], writer, arrays=WORKER["arrays"])
+    return out.getvalue(), summary
+
+def shards(kits, size):
+    shard = []
+    for kit in kits:
+        shard.append(kit)
+        if len(shard) == size:
+            yield shard
+            shard = []
+    if shard:
+        yield shard
+
+def validate_parallel(kits, inventory, total_budget, writer=None, engine="scalar", workers=None):
+    workers = workers or os.cpu_count() or 1
+    # Checked here so a missing NumPy is reported once instead of by every worker
+    engine = "numpy" if load_arrays(inventory, engine) else "scalar"
+    rows = [(comp.component_id, comp.type, comp.performance_score, comp.cost, comp.spec1, comp.spec2)
+            for comp in inventory.values()]
+    summary = BuildSummary()
+
+    def collect(result):
+        text, part = result.get()
+        if writer:
+            writer.out.write(text)
+        summary.merge(part)
+
+    with multiprocessing.Pool(workers, initializer=init_worker,
+                              initargs=(rows, total_budget, writer.fmt if writer else None, engine)) as pool:
+        pending = deque()   # a few shards per worker in flight keeps memory bounded
+        for shard in shards(kits, SHARD_SIZE):
+            pending.append(pool.apply_async(check_shard, (shard,)))
+            if len(pending) >= 2 * workers:
+                collect(pending.popleft())
+        while pending:
+            collect(pending.popleft())
+    return summary
+
+def print_batch_summary(summary, out, skipped=0):
+    print(f"Maximum Score: {summary.best_score}", file=out)
+    print(f"Best Build: {summary.best_kit}", file=out)
+    print(f"Kits: {summary.kits}, valid: {summary.valid}, failed: {summary.kits - summary.valid}", file=out)
+    for kind, count in sorted(summary.failures.items()):
+        print(f"  {kind}: {count}", file=out)
+    if skipped:
+        print(f"Components skipped: {skipped}", file=out)
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Validate PC build kits against a component inventory. "
+                                                 "Run without arguments for the interactive prompts.")
+    parser.add_argument("--budget", type=int, required=True, help="total budget in dollars")
+    parser.add_argument("--components", required=True, help="component file (.csv, .jsonl or space-separated text)")
+    parser.add_argument("--kits", required=True, help="build kit file, or - for stdin")
+    parser.add_argument("--input-format", choices=["csv", "jsonl", "text"],
+                        help="format of both input files (default: from the file extension)")
+    parser.add_argument("--output", default="-", help="results file (default: - for stdout)")
+    parser.add_argument("--format", default=None, choices=OUTPUT_FORMATS,
+                        help="results format (default: from --output extension, else csv)")
+    parser.add_argument("--skip-invalid", action="store_true", help="report bad rows and carry on instead of stopping")
+    parser.add_argument("--engine", default="auto", choices=ENGINES,
+                        help="validation engine (default: auto, NumPy when installed)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="processes to validate with (default: 1; 0 = one per CPU core)")
+    return parser
+
+# Runs write(out) on a temporary file beside `path` and only then moves it
+# over `path`, so a bad kit, a failed write or Ctrl-C leaves any earlier
+# results file as it was
+def write_replacing(path, write):
+    try:
+        mode = stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        mode = 0o666 & ~umask
+    fd, tmp = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp",
+                               dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(fd, 'w', newline='', encoding='utf-8', buffering=1024 * 1024) as out:
+            result = write(out)
+        os.chmod(tmp, mode)     # mkstemp makes it 0600
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+    return result
+
+def run_batch(argv):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    fmt = args.format or file_format(args.output, "csv")
+    if args.workers < 0:
+        parser.error("--workers must be 0 or more")
+    check = validate_stream if args.workers == 1 else partial(validate_parallel, workers=args.workers)
+    try:
+        inventory, skipped = load_inventory(args.components, args.input_format, args.skip_invalid)
+        kits = iter_kits(args.kits, args.input_format, args.skip_invalid)
+        # The kit file is opened and its first kit read before any output,
+        # so an unreadable file fails before a header reaches stdout
+        first = next(kits, None)
+        kits = chain([first] if first is not None else [], kits)
+        if args.output == "-":
+            summary = check(kits, inventory, args.budget, ResultWriter(sys.stdout, fmt), args.engine)
+            sys.stdout.flush()
+        else:
+            summary = write_replacing(args.output, lambda out: check(kits, inventory, args.budget,
+                                                                     ResultWriter(out, fmt), args.engine))
+    except (InputError, OSError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+    # The summary goes to stderr when the results are on stdout
+    print_batch_summary(summary, sys.stderr if args.output == "-" else sys.stdout, skipped)
+    return 0
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(run_batch(sys.argv[1:]))
+    run_interactive()
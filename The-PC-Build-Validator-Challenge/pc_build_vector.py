@@ -0,0 +1,148 @@
+import numpy as np
+
+# Vectorized validation engine
+# The inventory is turned into one NumPy array per attribute (cost, score,
+# TDP, wattage, and socket / RAM type as integer category codes, -1 where
+# the component does not have that attribute). A chunk of kits becomes an
+# n x 5 matrix of inventory row numbers (-1 for a missing ID), and every
+# check in validate_build is then one array expression over the chunk.
+# Results, failure reasons and the best kit are identical to validate_build.
+
+CHUNK_SIZE = 65536     # kits per array pass
+INT_LIMIT = 2 ** 59    # five of these still add up inside int64
+INT64_MAX = 2 ** 63 - 1
+
+# Same order validate_build appends its reasons in
+CHECKS = [("over_budget", "Over budget"),
+          ("socket_mismatch", "CPU and Motherboard socket mismatch"),
+          ("ram_mismatch", "RAM and Motherboard type mismatch"),
+          ("psu_insufficient", "PSU wattage insufficient")]
+
+def int_column(values):
+    if any(abs(value) >= INT_LIMIT for value in values):
+        raise OverflowError("component values too large for the NumPy engine")
+    return np.array(values, dtype=np.int64)
+
+# Category codes for an attribute that only some component types have
+def code_column(components, attribute, codes):
+    column = np.full(len(components), -1, dtype=np.int64)
+    for i, comp in enumerate(components):
+        if hasattr(comp, attribute):
+            column[i] = codes.setdefault(getattr(comp, attribute), len(codes))
+    return column
+
+class InventoryArrays:
+    def __init__(self, inventory):
+        self.ids = list(inventory)
+        self.index = {cid: i for i, cid in enumerate(self.ids)}
+        components = list(inventory.values())
+        self.cost = int_column([comp.cost for comp in components])
+        self.score = int_column([comp.performance_score for comp in components])
+        self.socket = code_column(components, "socket", {})
+        self.ram_type = code_column(components, "ram_type", {})
+        self.has_tdp = np.array([hasattr(comp, "tdp") for comp in components], dtype=bool)
+        self.tdp = int_column([getattr(comp, "tdp", 0) for comp in components])
+        self.has_wattage = np.array([hasattr(comp, "wattage") for comp in components], dtype=bool)
+        self.wattage = int_column([getattr(comp, "wattage", 0) for comp in components])
+
+    # n x 5 matrix of inventory rows for the kits' CPU..PSU IDs, -1 if missing
+    def kit_matrix(self, kits):
+        index = self.index
+        rows = np.empty((len(kits), 5), dtype=np.int64)
+        for slot in range(5):
+            rows[:, slot] = np.fromiter((index.get(kit[slot + 1], -1) for kit in kits), dtype=np.int64, count=len(kits))
+        return rows
+
+    # Every check for a chunk of kits at once; returns a dict of arrays
+    def validate_matrix(self, rows, total_budget):
+        n = len(rows)
+        missing = rows < 0
+        any_missing = missing.any(axis=1)
+        if not self.ids:
+            zeros = np.zeros(n, dtype=np.int64)
+            flags = np.zeros(n, dtype=bool)
+            return dict(missing=missing, any_missing=any_missing, cost=zeros, score=zeros, valid=flags,
+                        **{name: flags for name, _ in CHECKS})
+        cpu, mobo, gpu, ram, psu = np.where(missing, 0, rows).T
+
+        cost = self.cost[cpu] + self.cost[mobo] + self.cost[gpu] + self.cost[ram] + self.cost[psu]
+        score = self.score[cpu] + self.score[mobo] + self.score[gpu] + self.score[ram] + self.score[psu]
+        over_budget = cost > min(max(total_budget, -INT64_MAX), INT64_MAX)
+        socket_mismatch = (self.socket[cpu] >= 0) & (self.socket[mobo] >= 0) & (self.socket[cpu] != self.socket[mobo])
+        ram_mismatch = (self.ram_type[ram] >= 0) & (self.ram_type[mobo] >= 0) & (self.ram_type[ram] != self.ram_type[mobo])
+        psu_insufficient = (self.has_wattage[psu] & self.has_tdp[cpu] & self.has_tdp[gpu]
+                            & (self.wattage[psu] < self.tdp[cpu] + self.tdp[gpu] + 50))
+
+        # A kit with a missing part stops at that check, with cost and score 0
+        present = ~any_missing
+        checks = dict(over_budget=over_budget & present, socket_mismatch=socket_mismatch & present,
+                      ram_mismatch=ram_mismatch & present, psu_insufficient=psu_insufficient & present)
+        valid = present & ~(over_budget | socket_mismatch | ram_mismatch | psu_insufficient)
+        return dict(missing=missing, any_missing=any_missing, cost=np.where(present, cost, 0),
+                    score=np.where(present, score, 0), valid=valid, **checks)
+
+# validate_build's reasons list for kit i of a validate_matrix result
+def kit_reasons(kit, result, i):
+    if result["any_missing"][i]:
+        missing = [kit[slot + 1] for slot in range(5) if result["missing"][i, slot]]
+        return [f"Missing components: {', '.join(missing)}"]
+    return [reason for name, reason in CHECKS if result[name][i]]
+
+# Folds a chunk into a BuildSummary exactly as adding its kits one by one
+# would: with a strict > the first kit holding the highest valid score wins
+def add_chunk(summary, kits, result):
+    valid = result["valid"]
+    summary.kits += len(kits)
+    summary.valid += int(valid.sum())
+    counts = [("Missing components", int(result["any_missing"].sum()))]
+    counts += [(reason, int(result[name].sum())) for name, reason in CHECKS]
+    for kind, count in counts:
+        if count:
+            summary.failures[kind] = summary.failures.get(kind, 0) + count
+    if valid.any():
+        scores = np.where(valid, result["score"], np.iinfo(np.int64).min)
+        best = int(scores.argmax())
+        if int(scores[best]) > summary.best_score:
+            summary.best_score = int(scores[best])
+            summary.best_kit = kits[best][0]
+
+def chunks(kits, size):
+    chunk = []
+    for kit in kits:
+        chunk.append(kit)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+# (kit, valid, reasons, cost, score) per kit, in input order
+def validate_kits(kits, arrays, total_budget):
+    for chunk in chunks(kits, CHUNK_SIZE):
+        result = arrays.validate_matrix(arrays.kit_matrix(chunk), total_budget)
+        for i, (kit, valid, cost, score) in enumerate(zip(chunk, result["valid"].tolist(),
+                                                         result["cost"].tolist(), result["score"].tolist())):
+            yield kit, valid, ([] if valid else kit_reasons(kit, result, i)), cost, score
+
+# Vectorized counterpart of pc_build_validator.validate_stream; per-kit
+# Python work is only done when a writer needs the rows
+def validate_stream(kits, arrays, total_budget, summary, writer=None):
+    for chunk in chunks(kits, CHUNK_SIZE):
+        result = arrays.validate_matrix(arrays.kit_matrix(chunk), total_budget)
+        add_chunk(summary, chunk, result)
+        if writer:
+            for i, (kit, valid, cost, score) in enumerate(zip(chunk, result["valid"].tolist(),
+                                                             result["cost"].tolist(), result["score"].tolist())):
+                writer.write(kit[0], valid, [] if valid else kit_reasons(kit, result, i), cost, score)
+    return summary
+
+# Same return value as pc_build_validator.evaluate_builds
+def evaluate_builds(build_kits, inventory, total_budget):
+    arrays = InventoryArrays(inventory)
+    results = [{"kit_id": kit[0], "valid": valid, "reasons": reasons, "cost": cost, "score": score}
+               for kit, valid, reasons, cost, score in validate_kits(build_kits, arrays, total_budget)]
+    best_score, best_kit = 0, "NONE"
+    for res in results:
+        if res["valid"] and res["score"] > best_score:
+            best_score, best_kit = res["score"], res["kit_id"]
+    return results, best_score, best_kit
@@ -0,0 +1,235 @@
+import io
+import sys
+import zlib
+import math
+import pickle
+import struct
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Scrambled puzzle solver (module and command line version of the notebook)
+#
+# The steps follow the pseudocode, with these differences:
+#   - tiles are only decoded when their row of the picture is assembled,
+#     a row's tiles at a time and in parallel threads
+#   - rotations are undone with np.rot90 on the pixel arrays (PIL is only
+#     needed for tiles stored as encoded image bytes or PIL images)
+#   - each tile is copied straight into a preallocated band of pixel rows,
+#     and the band goes to disk as soon as it is full, so memory use does
+#     not grow with the size of the picture. PNG and .npy are written this
+#     way; any other format goes through PIL from one full canvas.
+
+DEFAULT_KEYS = {"image": "data", "index": "correct_index", "rotation": "applied_rotation_deg"}
+
+# Same name hints as the notebook, for pickles that use other key names
+KEY_HINTS = {"image": ("img", "image", "data", "tile"),
+             "index": ("correct_index", "index", "position", "pos"),
+             "rotation": ("rot", "rotate", "rotation", "angle")}
+
+# Step 2: Open the puzzle box
+def load_pieces(path):
+    with open(path, "rb") as f:
+        pieces = pickle.load(f)
+    if not isinstance(pieces, list) or not pieces or not isinstance(pieces[0], dict):
+        raise TypeError("Expected a non-empty list of dicts in pickle")
+    return pieces
+
+# Key names from the first piece; the notebook's names win, then the hints
+def detect_keys(sample, **given):
+    keys = {}
+    for role, default in DEFAULT_KEYS.items():
+        if given.get(role):
+            keys[role] = given[role]
+        elif default in sample:
+            keys[role] = default
+        else:
+            keys[role] = next((k for k in sample if any(x in k.lower() for x in KEY_HINTS[role])), None)
+    if keys["image"] is None or keys["index"] is None:
+        raise KeyError(f"Could not find the image and index keys among {list(sample)}")
+    return keys
+
+# Step 3: slots[correct_index] = scrambled list index, in one pass
+def sort_slots(pieces, index_key):
+    slots = [None] * (max(item[index_key] for item in pieces) + 1)
+    for i, item in enumerate(pieces):
+        correct = item[index_key]
+        if correct < 0:
+            raise ValueError(f"Piece {i} has a negative {index_key}: {correct}")
+        if slots[correct] is not None:
+            raise ValueError(f"Pieces {slots[correct]} and {i} both claim position {correct}")
+        slots[correct] = i
+    return slots
+
+# Step 4: turns needed to put a piece upright, as 90 degree counter-clockwise steps
+def undo_turns(item, rotation_key):
+    applied = int(item.get(rotation_key, 0)) if rotation_key else 0
+    undo = (360 - (applied % 360)) % 360
+    if undo % 90:
+        raise ValueError(f"Only multiples of 90 degrees can be undone, got {applied}")
+    return undo // 90
+
+# Pixels of one tile as an H x W x 3 uint8 array
+def decode_tile(raw):
+    if isinstance(raw, np.ndarray):
+        pixels = raw.astype(np.uint8, copy=False)
+    elif isinstance(raw, (bytes, bytearray)):
+        from PIL import Image
+        with Image.open(io.BytesIO(raw)) as img:
+            pixels = np.asarray(img.convert("RGB"))
+    elif isinstance(raw, dict):
+        key = next((k for k in ("img", "image", "data", "bytes") if k in raw), None)
+        if key is None:
+            raise TypeError("Unknown image type")
+        return decode_tile(raw[key])
+    elif hasattr(raw, "convert"):   # a PIL image
+        pixels = np.asarray(raw.convert("RGB"))
+    else:
+        raise TypeError("Unknown image type")
+    if pixels.ndim == 2:
+        pixels = np.repeat(pixels[:, :, None], 3, axis=2)
+    return pixels[:, :, :3]
+
+# Step 5: decode a piece and turn it upright (a view; nothing is copied yet)
+def corrected_tile(item, keys):
+    return np.rot90(decode_tile(item[keys["image"]]), undo_turns(item, keys["rotation"]))
+
+# ---------- Assembly ----------
+
+class Puzzle:
+    def __init__(self, pieces, cols=None, **keys):
+        self.pieces = pieces
+        self.keys = detect_keys(pieces[0], **keys)
+        self.slots = sort_slots(pieces, self.keys["index"])
+        if cols is not None and cols < 1:
+            raise ValueError("The number of columns must be at least 1")
+        self.cols = cols or math.isqrt(len(self.slots))
+        if cols is None and self.cols * self.cols != len(self.slots):
+            raise ValueError(f"{len(self.slots)} positions is not a square grid; give the number of columns")
+        self.rows = -(-len(self.slots) // self.cols)   # a partial last row is padded with black
+        first = next(i for i in self.slots if i is not None)
+        self.tile_height, self.tile_width = corrected_tile(pieces[first], self.keys).shape[:2]
+        self.height = self.tile_height * self.rows
+        self.width = self.tile_width * self.cols
+
+    # Step 6: (position, scrambled index, row, col, undo degrees) per placed piece
+    def placements(self):
+        for position, i in enumerate(self.slots):
+            if i is not None:
+                row, col = divmod(position, self.cols)
+                yield position, i, row, col, 90 * undo_turns(self.pieces[i], self.keys["rotation"])
+
+    def place(self, band, col, tile):
+        if tile.shape[:2] != (self.tile_height, self.tile_width):
+            raise ValueError(f"Tile is {tile.shape[1]}x{tile.shape[0]}, expected "
+                             f"{self.tile_width}x{self.tile_height}")
+        band[:, col * self.tile_width:(col + 1) * self.tile_width] = tile
+
+    # Yields each row of the picture as one band of pixels. The same band
+    # array is refilled for every row, so use it before asking for the next.
+    def bands(self, workers=None):
+        band = np.zeros((self.tile_height, self.width, 3), dtype=np.uint8)
+        with ThreadPoolExecutor(workers) as pool:
+            for row in range(self.rows):
+                band[:] = 0     # positions with no piece stay black
+                items = list(enumerate(self.slots[row * self.cols:(row + 1) * self.cols]))
+                items = [(col, self.pieces[i]) for col, i in items if i is not None]
+                # Pixel arrays need no decoding, so only encoded tiles go to the threads
+                tiles = [corrected_tile(item, self.keys) if isinstance(item[self.keys["image"]], np.ndarray)
+                         else pool.submit(corrected_tile, item, self.keys) for _, item in items]
+                for (col, _), tile in zip(items, tiles):
+                    self.place(band, col, tile if isinstance(tile, np.ndarray) else tile.result())
+                yield band
+
+    # The whole picture in one preallocated array
+    def assemble(self, workers=None, out=None):
+        canvas = np.zeros((self.height, self.width, 3), dtype=np.uint8) if out is None else out
+        for row, band in enumerate(self.bands(workers)):
+            canvas[row * self.tile_height:(row + 1) * self.tile_height] = band
+        return canvas
+
+# ---------- Output ----------
+
+def png_chunk(f, tag, data):
+    f.write(struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data)))
+
+# PNG Paeth filter: each byte minus whichever of left, above and upper-left
+# is closest to left + above - upper-left. rows and above are int16.
+def paeth_filter(rows, above):
+    left = np.zeros_like(rows)
+    left[:, 3:] = rows[:, :-3]
+    upper_left = np.zeros_like(rows)
+    upper_left[:, 3:] = above[:, :-3]
+    guess = left + above - upper_left
+    to_left, to_above, to_corner = np.abs(guess - left), np.abs(guess - above), np.abs(guess - upper_left)
+    predicted = np.where((to_left <= to_above) & (to_left <= to_corner), left,
+                         np.where(to_above <= to_corner, above, upper_left))
+    return (rows - predicted).astype(np.uint8)
+
+# 8-bit RGB PNG written a band of rows at a time
+def write_png(path, puzzle, workers=None, level=6):
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        png_chunk(f, b"IHDR", struct.pack(">IIBBBBB", puzzle.width, puzzle.height, 8, 2, 0, 0, 0))
+        compressor = zlib.compressobj(level)
+        previous = np.zeros((1, puzzle.width * 3), dtype=np.int16)    # the row above the band
+        for band in puzzle.bands(workers):
+            rows = band.reshape(len(band), -1).astype(np.int16)
+            filtered = np.empty((len(rows), rows.shape[1] + 1), dtype=np.uint8)
+            filtered[:, 0] = 4      # Paeth
+            filtered[:, 1:] = paeth_filter(rows, np.concatenate([previous, rows[:-1]]))
+            previous = rows[-1:]
+            data = compressor.compress(filtered.tobytes())
+            if data:
+                png_chunk(f, b"IDAT", data)
+        png_chunk(f, b"IDAT", compressor.flush())
+        png_chunk(f, b"IEND", b"")
+
+# Step 7: save the picture; the format comes from the file name
+def save(path, puzzle, workers=None):
+    lowered = path.lower()
+    if lowered.endswith(".png"):
+        write_png(path, puzzle, workers)
+    elif lowered.endswith(".npy"):
+        canvas = np.lib.format.open_memmap(path, mode="w+", dtype=np.uint8, shape=(puzzle.height, puzzle.width, 3))
+        puzzle.assemble(workers, out=canvas)
+        canvas.flush()
+    else:
+        from PIL import Image
+        Image.fromarray(puzzle.assemble(workers)).save(path)
+
+def print_report(puzzle, out=sys.stdout):
+    print("correct_position_index -> scrambled_list_index | (row,col) | undo rotation", file=out)
+    for position, i, row, col, undo in puzzle.placements():
+        print(f"{position:02d} -> {i:02d} | ({row},{col}) | {undo}°", file=out)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Put a scrambled puzzle pickle back together.")
+    parser.add_argument("pickle", nargs="?", default="scrambled_puzzle_data.pkl",
+                        help="list of piece dicts (default: scrambled_puzzle_data.pkl)")
+    parser.add_argument("-o", "--output", default="unscrambled_puzzle.png",
+                        help="picture to write: .png or .npy are written row by row, other formats need Pillow "
+                             "(default: unscrambled_puzzle.png)")
+    parser.add_argument("--cols", type=int, help="pieces per row (default: square grid)")
+    parser.add_argument("--workers", type=int, help="threads decoding tiles (default: Python's choice)")
+    parser.add_argument("--image-key", help="key of the tile image (default: detected)")
+    parser.add_argument("--index-key", help="key of the correct position (default: detected)")
+    parser.add_argument("--rotation-key", help="key of the applied rotation in degrees (default: detected)")
+    parser.add_argument("--list", action="store_true", help="print where each piece goes and how it is turned")
+    args = parser.parse_args(argv)
+    try:
+        puzzle = Puzzle(load_pieces(args.pickle), args.cols, image=args.image_key, index=args.index_key,
+                        rotation=args.rotation_key)
+        if args.list:
+            print_report(puzzle)
+        save(args.output, puzzle, args.workers)
+    except (OSError, pickle.UnpicklingError, TypeError, KeyError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    print(f"{len(puzzle.pieces)} pieces, {puzzle.cols}x{puzzle.rows} grid -> {args.output} "
+          f"({puzzle.width}x{puzzle.height})")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
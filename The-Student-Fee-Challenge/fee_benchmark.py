@@ -0,0 +1,326 @@
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import builtins
+import platform
+import tempfile
+import subprocess
+import tracemalloc
+from contextlib import contextmanager, redirect_stdout
+from datetime import date, datetime, timedelta
+from prettytable import PrettyTable
+from fee_storage import save_data, save_records, migrate_json_to_sqlite, JsonStorage, SqliteStorage
+from student_fee_management_system import FeeTracker, CAMPUSES
+
+# ========== Synthetic Data ==========
+
+# Shares are rough figures for a mid-sized university; BDIP has no fee
+# structure on purpose so "No Fee Info" rows show up in the reports
+PROGRAMS = {"BIT": 0.22, "BCS": 0.18, "BBA": 0.30, "BED": 0.16, "BSN": 0.12, "BDIP": 0.02}
+PROGRAM_FEES = {"BIT": 2400000.0, "BCS": 2600000.0, "BBA": 1800000.0, "BED": 1500000.0, "BSN": 2900000.0}
+CAMPUS_SHARES = [0.50, 0.25, 0.15, 0.10]  # same order as CAMPUSES
+YEAR_SHARES = {1: 0.34, 2: 0.28, 3: 0.22, 4: 0.16}
+TERM_STARTS = [date(2025, 8, 11), date(2026, 1, 12), date(2026, 5, 18)]
+
+# n -> S00B00/000; unique for n below ten million
+def student_id(n):
+    return f"S{n // 100000 % 100:02}B{n // 1000 % 100:02}/{n % 1000:03}"
+
+def generate_students(count, rnd):
+    programs = rnd.choices(list(PROGRAMS), weights=list(PROGRAMS.values()), k=count)
+    campuses = rnd.choices(CAMPUSES, weights=CAMPUS_SHARES, k=count)
+    years = rnd.choices(list(YEAR_SHARES), weights=list(YEAR_SHARES.values()), k=count)
+    return [{"student_id": student_id(n), "name": f"Student {chr(65 + n % 26)}{chr(65 + n // 26 % 26)}",
+             "program": programs[n], "campus": campuses[n], "year_of_study": years[n]}
+            for n in range(count)]
+
+def generate_fees():
+    # Later years cost a little more
+    return [{"program": program, "year": year, "total_fee": fee * (1 + 0.05 * (year - 1))}
+            for program, fee in PROGRAM_FEES.items() for year in YEAR_SHARES]
+
+# Instalments of 5-30% of the fee, rounded to 1000 and never more than the
+# balance, mostly paid in the first weeks of a term. Stops early if every
+# student has cleared.
+def generate_payments(count, students, fees, rnd):
+    fee_by_key = {(f["program"], f["year"]): f["total_fee"] for f in fees}
+    # [student_id, balance, largest instalment share]; a quarter of the
+    # students pay in larger instalments
+    owing = [[s["student_id"], fee_by_key[(s["program"], s["year_of_study"])], 0.30 if rnd.random() < 0.25 else 0.20]
+             for s in students if (s["program"], s["year_of_study"]) in fee_by_key]
+    for n in range(1, count + 1):
+        if not owing:
+            return
+        i = rnd.randrange(len(owing))
+        sid, balance, largest = owing[i]
+        amount = min(balance, max(1000.0, round(balance * rnd.uniform(0.05, largest), -3)))
+        owing[i][1] -= amount
+        if owing[i][1] <= 0:
+            owing[i] = owing[-1]  # swap-remove cleared students
+            owing.pop()
+        when = rnd.choice(TERM_STARTS) + timedelta(days=int(abs(rnd.gauss(0, 20))))
+        yield {"payment_id": f"PAY-{n:03}", "student_id": sid, "amount": amount, "date": when.isoformat()}
+
+# Writes students.json, fees.json and payments.json into folder
+def generate(folder, records, students, seed):
+    rnd = random.Random(seed)
+    student_list = generate_students(students, rnd)
+    fees = generate_fees()
+    save_data(os.path.join(folder, 'students.json'), student_list)
+    save_data(os.path.join(folder, 'fees.json'), fees)
+    save_records(os.path.join(folder, 'payments.json'), generate_payments(records, student_list, fees, rnd))
+
+# ========== Scripted Menu Input ==========
+
+# Feeds the menu methods fixed answers and throws their output away.
+# Once the answers run out every prompt gets Enter (next report page).
+@contextmanager
+def scripted(answers=()):
+    answers = iter(answers)
+    real_input = builtins.input
+    builtins.input = lambda prompt="": next(answers, "")
+    try:
+        with open(os.devnull, 'w', encoding='utf-8') as null, redirect_stdout(null):
+            yield
+    finally:
+        builtins.input = real_input
+
+def open_store(storage):
+    if storage == "sqlite":
+        return SqliteStorage('fees.db')
+    return JsonStorage(journaled=storage == "journal")
+
+# ========== Benchmarks ==========
+
+# Each benchmark is (name, unit, setup, run). setup(app) runs untimed before
+# every run; run(app) performs the operation once and returns how many
+# units it handled, for the throughput column.
+
+def count_payments(app):
+    return sum(1 for _ in app.store.iter_records("payments"))
+
+# Start-up plus the first payment access, since payments load lazily
+def load_benchmark(storage, drop_snapshot):
+    def setup(app):
+        app.store.close()
+        if drop_snapshot and os.path.exists('payments.snap'):
+            os.remove('payments.snap')
+
+    def run(app):
+        app.store = open_store(storage)
+        app.store.overall_totals()
+        return (sum(1 for _ in app.store.iter_students()) + sum(1 for _ in app.store.iter_fees())
+                + count_payments(app))
+    return setup, run
+
+def menu_benchmark(method, answers=(), units=1):
+    def run(app):
+        with scripted(answers):
+            getattr(app, method)()
+        return units(app) if callable(units) else units
+    return None, run
+
+# A menu report on a freshly opened store, so nothing it skips loading
+# (payments, for the trend reports) is already in memory
+def cold_benchmark(storage, method, answers=()):
+    def setup(app):
+        app.store.close()
+        app.store = open_store(storage)
+    return setup, menu_benchmark(method, answers)[1]
+
+# ops calls of a menu method, each with its own answers
+def repeated_benchmark(method, answers_per_call):
+    def run(app):
+        calls = answers_per_call()
+        with scripted(answer for answers in calls for answer in answers):
+            for _ in calls:
+                getattr(app, method)()
+        return len(calls)
+    return None, run
+
+def build_benchmarks(app, storage, ops, rnd):
+    students = list(app.store.iter_students())
+    payment_ids = [p["payment_id"] for p in app.store.payments_between(limit=1000)]
+    sample_student = rnd.choice(students)["student_id"]
+    sample_payment = rnd.choice(payment_ids) if payment_ids else "PAY-001"
+    # Students who can still take a few payments of 1
+    payers = []
+    for s in students:
+        total_fee, total_paid, balance, status = app.compute_student_balance(s)
+        if status == "Not Cleared" and balance >= 10:
+            payers.append(s["student_id"])
+
+    def balances(app):
+        sample = rnd.sample(students, min(ops, len(students)))
+        for s in sample:
+            app.compute_student_balance(s)
+        return len(sample)
+
+    def payment_answers():
+        return [(sid, "1") for sid in rnd.sample(payers, min(ops, len(payers)))]
+
+    if storage == "sqlite":
+        benchmarks = [("load_data", "records", *load_benchmark(storage, False))]
+    else:
+        benchmarks = [("load_data (JSON)", "records", *load_benchmark(storage, True)),
+                      ("load_data (snapshot)", "records", *load_benchmark(storage, False))]
+    benchmarks += [
+        ("compute_student_balance", "ops", None, balances),
+        ("report_per_student", "rows", *menu_benchmark("report_per_student", units=len(students))),
+        ("report_per_program", "ops", *menu_benchmark("report_per_program")),
+        ("report_overall_summary", "ops", *menu_benchmark("report_overall_summary")),
+        ("filter 1 program", "ops", *menu_benchmark("filter_records", ["1", "BBA"])),
+        ("filter 2 campus", "ops", *menu_benchmark("filter_records", ["2", "Kampala"])),
+        ("filter 3 status", "ops", *menu_benchmark("filter_records", ["3", "Cleared"])),
+        ("filter 4 student id", "ops", *menu_benchmark("filter_records", ["4", sample_student])),
+        ("filter 5 payment id", "ops", *menu_benchmark("filter_records", ["5", sample_payment])),
+        ("filter 6 payment date", "ops", *menu_benchmark("filter_records", ["6", TERM_STARTS[0].isoformat()])),
+        ("filter 7 combined", "ops", *menu_benchmark("filter_records",
+                                                    ["7", "BIT", "Main", "2", "Not Cleared", "2025-08-01", "2025-12-31"])),
+        ("filter 8 date range", "ops", *menu_benchmark("filter_records", ["8", "2026-01-01", "2026-01-31"])),
+        ("collection trend (day)", "ops", *menu_benchmark("report_collection_trend", ["day", "both"])),
+        ("collection trend (cold)", "ops", *cold_benchmark(storage, "report_collection_trend", ["day", "both"])),
+        ("cumulative collections", "ops", *menu_benchmark("report_cumulative_collections", ["month", "campus"])),
+        ("export_data", "rows", *menu_benchmark("export_data", ["payments.json", "csv"], units=count_payments)),
+        # Last, because it changes the data
+        ("record_payment", "ops", *repeated_benchmark("record_payment", payment_answers)),
+    ]
+    return benchmarks
+
+# Best wall time over `repeat` runs, then one more run under tracemalloc
+# for the peak memory it allocated on top of what was already in use
+def measure(app, setup, run, repeat, memory):
+    best, units = None, 0
+    for _ in range(repeat):
+        if setup:
+            setup(app)
+        start = time.perf_counter()
+        units = run(app)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    result = {"seconds": best, "units": units, "per_second": units / best if best else None}
+    if memory:
+        if setup:
+            setup(app)
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        run(app)
+        result["peak_kb"] = (tracemalloc.get_traced_memory()[1] - baseline) // 1024
+        tracemalloc.stop()
+    return result
+
+def run_suite(records, students, args):
+    folder = tempfile.mkdtemp(prefix=f"fee_bench_{records}_")
+    home = os.getcwd()
+    try:
+        generate(folder, records, students, args.seed)
+        os.chdir(folder)
+        if args.storage == "sqlite":
+            migrate_json_to_sqlite('fees.db')
+        app = FeeTracker(open_store(args.storage))
+        rnd = random.Random(args.seed)
+        results = {}
+        for name, unit, setup, run in build_benchmarks(app, args.storage, args.ops, rnd):
+            if args.only and not any(word in name for word in args.only):
+                continue
+            # Writes are not repeated, so every run sees the same data size
+            repeat = 1 if name == "record_payment" else args.repeat
+            results[name] = dict(measure(app, setup, run, repeat, args.memory), unit=unit)
+            print(f"  {name:<26} {results[name]['seconds']:9.4f}s", file=sys.stderr)
+        app.store.close()
+        return results
+    finally:
+        os.chdir(home)
+        if args.keep:
+            print(f"Data kept in {folder}", file=sys.stderr)
+        else:
+            shutil.rmtree(folder, ignore_errors=True)
+
+# ========== Results ==========
+
+def current_label():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unlabelled"
+
+def load_results(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+# Latest earlier run with the same storage and size (and label, if given)
+def find_baseline(history, entry, label=None):
+    for old in reversed(history):
+        if (old["storage"], old["records"], old["students"]) != (entry["storage"], entry["records"], entry["students"]):
+            continue
+        if label is None or old["label"] == label:
+            return old
+    return None
+
+def print_results(entry, baseline):
+    columns = ["Benchmark", "Time (s)", "Units", "Throughput", "Peak KB"]
+    if baseline:
+        columns.append(f"vs {baseline['label']}")
+    table = PrettyTable(columns)
+    table.align = "r"
+    table.align["Benchmark"] = "l"
+    for name, result in entry["benchmarks"].items():
+        per_second = result["per_second"]
+        row = [name, f"{result['seconds']:.4f}", f"{result['units']} {result['unit']}",
+               f"{per_second:,.0f} {result['unit']}/s" if per_second else "-", result.get("peak_kb", "-")]
+        if baseline:
+            old = baseline["benchmarks"].get(name)
+            row.append(f"{(result['seconds'] / old['seconds'] - 1) * 100:+.1f}%" if old and old["seconds"] else "-")
+        table.add_row(row)
+    print(f"\n{entry['storage']} storage, {entry['records']} payments, {entry['students']} students "
+          f"(label {entry['label']}, seed {entry['seed']})")
+    print(table)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the Student Fee Management System on synthetic data")
+    parser.add_argument("--records", type=int, nargs="+", default=[10000, 100000],
+                        help="payment counts to run (default: 10000 100000)")
+    parser.add_argument("--students", type=int, help="students per run (default: a quarter of the payments)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--storage", default="json", choices=["json", "journal", "sqlite"])
+    parser.add_argument("--ops", type=int, default=100, help="calls per single-record benchmark (default: 100)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per read benchmark, best one kept (default: 3)")
+    parser.add_argument("--no-memory", dest="memory", action="store_false", help="skip the tracemalloc run")
+    parser.add_argument("--only", nargs="+", help="run only benchmarks whose name contains one of these words")
+    parser.add_argument("--results", default="bench_results.jsonl", help="JSON-lines file the runs are appended to")
+    parser.add_argument("--label", help="name for this run (default: current git commit)")
+    parser.add_argument("--compare", metavar="LABEL", help="compare with the latest run of this label "
+                                                          "(default: the latest run of the same size)")
+    parser.add_argument("--keep", action="store_true", help="keep the generated data folders")
+    parser.add_argument("--generate", metavar="FOLDER", help="only write the synthetic JSON files to FOLDER")
+    args = parser.parse_args()
+
+    if args.generate:
+        os.makedirs(args.generate, exist_ok=True)
+        for records in args.records:
+            generate(args.generate, records, args.students or max(records // 4, 10), args.seed)
+        print(f"✅ Synthetic data written to {args.generate}")
+        sys.exit(0)
+
+    results_file = os.path.abspath(args.results)
+    history = load_results(results_file)
+    label = args.label or current_label()
+    for records in args.records:
+        students = args.students or max(records // 4, 10)
+        print(f"Running {records} payments / {students} students ...", file=sys.stderr)
+        entry = {"label": label, "time": datetime.now().isoformat(timespec="seconds"),
+                 "python": platform.python_version(), "storage": args.storage, "records": records,
+                 "students": students, "seed": args.seed, "ops": args.ops,
+                 "benchmarks": run_suite(records, students, args)}
+        print_results(entry, find_baseline(history, entry, args.compare))
+        with open(results_file, 'a') as f:
+            f.write(json.dumps(entry) + "\n")
+        history.append(entry)
+    print(f"✅ Results appended to {results_file}")
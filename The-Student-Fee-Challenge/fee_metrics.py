@@ -0,0 +1,121 @@
+import re
+import json
+import time
+import cProfile
+import builtins
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from functools import wraps
+
+# ========== Operation Metrics ==========
+
+# Off by default. While off, track() hands back a shared do-nothing context
+# and @tracked functions make one attribute check before calling through, so
+# the cost is a few hundred nanoseconds per call.
+#
+# While on, every tracked operation gets:
+#   calls          number of times it ran
+#   seconds        wall time, including any nested operations
+#   input_wait     part of that spent waiting at an input() prompt
+#   bytes_read     JSON, journal and snapshot bytes read while it ran
+#   bytes_written  same, written
+# Nested operations count towards every operation around them, so a menu
+# action includes the save_data calls it made.
+
+METRIC_FIELDS = ("calls", "seconds", "input_wait", "bytes_read", "bytes_written")
+NO_TRACKING = nullcontext()
+
+class Metrics:
+    def __init__(self):
+        self.enabled = False
+        self.operations = {}    # name -> {field: value}
+        self.active = []        # stats of the operations running right now, outermost first
+        self.profile_name = None
+        self.profile_file = None
+        self.started = None
+
+    # profile: name of one operation to capture with cProfile the next time it runs
+    def enable(self, profile=None):
+        if self.enabled:
+            return
+        self.enabled = True
+        self.profile_name = profile
+        self.started = datetime.now().isoformat(timespec="seconds")
+        real_input = builtins.input
+
+        def timed_input(prompt=""):
+            start = time.perf_counter()
+            try:
+                return real_input(prompt)
+            finally:
+                self.add("input_wait", time.perf_counter() - start)
+        builtins.input = timed_input
+
+    def track(self, name):
+        return self.tracking(name) if self.enabled else NO_TRACKING
+
+    @contextmanager
+    def tracking(self, name):
+        stats = self.operations.get(name)
+        if stats is None:
+            stats = self.operations[name] = dict.fromkeys(METRIC_FIELDS, 0)
+        nested = any(s is stats for s in self.active)  # recursion: time counted once
+        profiler = None
+        if name == self.profile_name and self.profile_file is None:
+            profiler = cProfile.Profile()
+            profiler.enable()
+        self.active.append(stats)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.active.pop()
+            stats["calls"] += 1
+            if not nested:
+                stats["seconds"] += elapsed
+            if profiler:
+                profiler.disable()
+                self.profile_file = "profile-" + re.sub(r"[^A-Za-z0-9]+", "_", name).strip("_") + ".prof"
+                profiler.dump_stats(self.profile_file)
+
+    # Adds value to a field of every operation currently running
+    def add(self, field, value):
+        seen = set()
+        for stats in self.active:
+            if id(stats) not in seen:
+                seen.add(id(stats))
+                stats[field] += value
+
+    def count_bytes(self, read=0, written=0):
+        if read:
+            self.add("bytes_read", read)
+        if written:
+            self.add("bytes_written", written)
+
+    # (name, stats) with busy time (wall time minus input wait) added, busiest first
+    def rows(self):
+        rows = [(name, dict(stats, busy=stats["seconds"] - stats["input_wait"]))
+                for name, stats in self.operations.items()]
+        rows.sort(key=lambda row: row[1]["busy"], reverse=True)
+        return rows
+
+    def dump(self, filename):
+        data = {"started": self.started, "dumped": datetime.now().isoformat(timespec="seconds"),
+                "profile": self.profile_file, "operations": dict(self.rows())}
+        with open(filename, 'w') as f:
+            json.dump(data, f, indent=4)
+
+METRICS = Metrics()
+
+# Decorator form of METRICS.track for plain (non-generator) functions
+def tracked(name):
+    def decorate(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not METRICS.enabled:
+                return func(*args, **kwargs)
+            with METRICS.tracking(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
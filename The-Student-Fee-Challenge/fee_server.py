@@ -0,0 +1,336 @@
+import os
+import sys
+import json
+import asyncio
+import argparse
+import traceback
+from http import HTTPStatus
+from urllib.parse import urlsplit, parse_qs, unquote
+from fee_storage import load_data, clearance_status
+from student_fee_management_system import FeeTracker, ADMIN_FILE, TREND_PERIODS, open_store, query_criteria
+
+# ========== HTTP/JSON Service ==========
+
+# A small HTTP/1.1 server on asyncio streams, standard library only. Every
+# request needs the admin PIN in an X-Admin-PIN header.
+#
+#   GET    /students[?program=&campus=&year=&status=&paid_from=&paid_to=&offset=&limit=]
+#   GET    /students/<id>           student, balance and payments
+#   POST   /students                {"student_id", "name", "program", "campus", "year_of_study"}
+#   PATCH  /students/<id>           any of those fields
+#   DELETE /students/<id>
+#   GET    /fees                    POST /fees {"program", "year", "total_fee"}
+#   GET    /payments[?date=|from=&to=][&offset=&limit=]
+#   GET    /payments/<id>           POST /payments {"student_id", "amount"[, "date"]}
+#   GET    /reports/students[?offset=&limit=]  /reports/programs  /reports/summary
+#   GET    /reports/collections[?period=day|week|month&by=campus&by=program&campus=&program=&from=&to=&cumulative=1]
+#
+# Reads run straight on the event loop against the one in-memory store, so
+# any number of clients are served between writes. Writes are queued to a
+# single writer task, which applies everything waiting in one store batch
+# (one save or journal append) and then empties the response cache. GET
+# responses are cached by URL until that happens.
+
+MAX_BODY = 1024 * 1024
+IDLE_TIMEOUT = 30       # seconds a kept-alive connection may sit unused
+WRITE_GROUP_SIZE = 500  # most writes applied in one batch
+CACHE_ENTRIES = 1000    # cached GET responses kept between writes
+
+class HttpError(Exception):
+    def __init__(self, status, message=None):
+        super().__init__(message or status.phrase)
+        self.status = status
+
+def integer(query, name, default=None):
+    value = query.get(name, [""])[0].strip()
+    if not value:
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise HttpError(HTTPStatus.BAD_REQUEST, f"{name} must be a whole number.")
+    if number < 0:
+        raise HttpError(HTTPStatus.BAD_REQUEST, f"{name} cannot be negative.")
+    return number
+
+def balance_fields(total_fee, total_paid):
+    return {"total_fee": total_fee, "paid": total_paid,
+            "balance": None if total_fee is None else total_fee - total_paid,
+            "status": clearance_status(total_fee, total_paid)}
+
+class FeeServer:
+    def __init__(self, tracker, pin, refresh=0):
+        self.tracker = tracker
+        self.store = tracker.store
+        self.pin = pin
+        self.refresh = refresh
+        self.cache = {}  # "path?query" -> (status, body bytes)
+        self.writes = None
+
+    async def serve(self, host, port):
+        self.writes = asyncio.Queue()
+        tasks = [asyncio.create_task(self.write_loop())]
+        if self.refresh:
+            tasks.append(asyncio.create_task(self.refresh_loop()))
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        print(f"✅ Serving on http://{host}:{port} (Ctrl+C to stop)")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    # ---------- Connections ----------
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), IDLE_TIMEOUT)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    await self.respond(writer, HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE,
+                                       {"error": "Request headers too large."}, close=True)
+                    break
+                lines = head.decode('latin-1').split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ")
+                except ValueError:
+                    await self.respond(writer, HTTPStatus.BAD_REQUEST, {"error": "Malformed request line."}, close=True)
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    name, _, value = line.partition(":")
+                    if name:
+                        headers[name.strip().lower()] = value.strip()
+                try:
+                    length = int(headers.get("content-length", "0") or 0)
+                except ValueError:
+                    length = -1
+                if not 0 <= length <= MAX_BODY:
+                    await self.respond(writer, HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"error": "Missing or too large body."}, close=True)
+                    break
+                body = await reader.readexactly(length) if length else b""
+                close = (headers.get("connection", "").lower() == "close"
+                         or (version == "HTTP/1.0" and headers.get("connection", "").lower() != "keep-alive"))
+                status, payload = await self.handle_request(method, target, headers, body)
+                await self.respond(writer, status, payload, close)
+                if close:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, writer, status, payload, close=False):
+        body = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+        head = (f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'close' if close else 'keep-alive'}\r\n\r\n")
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+    # ---------- Routing ----------
+
+    async def handle_request(self, method, target, headers, body):
+        if headers.get("x-admin-pin") != self.pin:
+            return HTTPStatus.UNAUTHORIZED, {"error": "Missing or wrong X-Admin-PIN header."}
+        url = urlsplit(target)
+        # Student IDs contain a slash, so everything after the collection is the ID
+        collection, _, ident = unquote(url.path).strip("/").partition("/")
+        query = parse_qs(url.query)
+        try:
+            if method == "GET":
+                cached = self.cache.get(target)
+                if cached is None:
+                    status, payload = self.read(collection, ident, query)
+                    if len(self.cache) >= CACHE_ENTRIES:
+                        del self.cache[next(iter(self.cache))]  # oldest first
+                    cached = self.cache[target] = status, json.dumps(payload).encode()
+                return cached
+            if method in ("POST", "PATCH", "PUT", "DELETE"):
+                try:
+                    data = json.loads(body) if body else {}
+                except json.JSONDecodeError:
+                    raise HttpError(HTTPStatus.BAD_REQUEST, "Body must be JSON.")
+                if not isinstance(data, dict):
+                    raise HttpError(HTTPStatus.BAD_REQUEST, "Body must be a JSON object.")
+                action = self.write_action(method, collection, ident, data)
+                future = asyncio.get_running_loop().create_future()
+                await self.writes.put((action, future))
+                return await future
+            raise HttpError(HTTPStatus.METHOD_NOT_ALLOWED)
+        except HttpError as e:
+            return e.status, {"error": str(e)}
+        except ValueError as e:
+            return HTTPStatus.BAD_REQUEST, {"error": str(e)}
+        except Exception as e:
+            traceback.print_exc()
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)}
+
+    # ---------- Reads ----------
+
+    def read(self, collection, ident, query):
+        store = self.store
+        offset, limit = integer(query, "offset", 0), integer(query, "limit")
+        if collection == "students":
+            if ident:
+                student = store.get_student(ident)
+                if not student:
+                    raise HttpError(HTTPStatus.NOT_FOUND, "Student not found.")
+                fee = store.get_fee(student["program"], student["year_of_study"])
+                return HTTPStatus.OK, dict(student, **balance_fields(fee["total_fee"] if fee else None,
+                                                                     store.total_paid(ident)),
+                                           payments=store.student_payments(ident))
+            criteria = query_criteria(*(query.get(name, [""])[0] for name in
+                                        ("program", "campus", "year", "status", "paid_from", "paid_to")))
+            rows = [dict(student, **balance_fields(total_fee, paid))
+                    for student, total_fee, paid in store.student_balances(offset=offset, limit=limit, **criteria)]
+            return HTTPStatus.OK, {"students": rows, "offset": offset, "count": len(rows)}
+        if collection == "fees" and not ident:
+            return HTTPStatus.OK, {"fees": list(store.iter_fees())}
+        if collection == "payments":
+            if ident:
+                payment = store.get_payment(ident)
+                if not payment:
+                    raise HttpError(HTTPStatus.NOT_FOUND, "Payment not found.")
+                return HTTPStatus.OK, payment
+            on = query.get("date", [""])[0]
+            dates = query_criteria(paid_from=on or query.get("from", [""])[0], paid_to=on or query.get("to", [""])[0])
+            rows = list(store.payments_between(dates.get("paid_from"), dates.get("paid_to"), offset, limit))
+            return HTTPStatus.OK, {"payments": rows, "offset": offset, "count": len(rows)}
+        if collection == "reports":
+            if ident == "students":
+                rows = list(self.tracker.student_report_rows(store.student_balances(offset=offset, limit=limit)))
+                return HTTPStatus.OK, {"students": rows, "offset": offset, "count": len(rows)}
+            if ident == "programs":
+                return HTTPStatus.OK, {"programs": [{"program": program, "expected": expected, "collected": collected,
+                                                     "outstanding": expected - collected}
+                                                    for program, expected, collected in store.program_totals()]}
+            if ident == "summary":
+                expected, collected = store.overall_totals()
+                return HTTPStatus.OK, {"expected": expected, "collected": collected, "outstanding": expected - collected}
+            if ident == "collections":
+                period = query.get("period", [""])[0].strip().lower() or "month"
+                if period not in TREND_PERIODS:
+                    raise HttpError(HTTPStatus.BAD_REQUEST, "period must be day, week or month.")
+                by = query.get("by", [])
+                if any(name not in ("campus", "program") for name in by):
+                    raise HttpError(HTTPStatus.BAD_REQUEST, "by must be campus or program.")
+                criteria = query_criteria(program=query.get("program", [""])[0], campus=query.get("campus", [""])[0],
+                                          paid_from=query.get("from", [""])[0], paid_to=query.get("to", [""])[0])
+                rows = list(self.tracker.collection_rows(period, "campus" in by, "program" in by,
+                                                         query.get("cumulative", [""])[0].lower() in ("1", "true"),
+                                                         criteria.get("campus"), criteria.get("program"),
+                                                         criteria.get("paid_from"), criteria.get("paid_to")))
+                return HTTPStatus.OK, {"collections": rows, "count": len(rows)}
+        raise HttpError(HTTPStatus.NOT_FOUND)
+
+    # ---------- Writes ----------
+
+    # Returns a function that performs the write inside the writer's batch
+    # and returns (status, payload); checks run there too, so they see every
+    # earlier write
+    def write_action(self, method, collection, ident, data):
+        tracker, store = self.tracker, self.store
+        if collection == "students" and method == "POST" and not ident:
+            def action():
+                record = tracker.check_student(data)
+                store.commit("student", record)
+                return HTTPStatus.CREATED, record
+        elif collection == "students" and method in ("PATCH", "PUT") and ident:
+            def action():
+                student = store.get_student(ident)
+                if not student:
+                    raise HttpError(HTTPStatus.NOT_FOUND, "Student not found.")
+                record = tracker.check_student({**student, **data, "student_id": ident}, existing=True)
+                store.commit("student", record)
+                return HTTPStatus.OK, record
+        elif collection == "students" and method == "DELETE" and ident:
+            def action():
+                if not store.get_student(ident):
+                    raise HttpError(HTTPStatus.NOT_FOUND, "Student not found.")
+                store.commit("delete_student", {"student_id": ident})
+                return HTTPStatus.OK, {"deleted": ident}
+        elif collection == "fees" and method in ("POST", "PUT") and not ident:
+            def action():
+                record = tracker.check_fee(data)
+                store.commit("fee", record)
+                return HTTPStatus.OK, record
+        elif collection == "payments" and method == "POST" and not ident:
+            def action():
+                record = tracker.check_payment(data)
+                store.commit("payment", record)
+                return HTTPStatus.CREATED, record
+        else:
+            raise HttpError(HTTPStatus.METHOD_NOT_ALLOWED if collection in ("students", "fees", "payments", "reports")
+                            else HTTPStatus.NOT_FOUND)
+        return action
+
+    async def write_loop(self):
+        while True:
+            jobs = [await self.writes.get()]
+            while not self.writes.empty() and len(jobs) < WRITE_GROUP_SIZE:
+                jobs.append(self.writes.get_nowait())
+            results = []
+            try:
+                # Group commit: one save (or journal append) for everything queued.
+                # Nothing in here awaits, so no read ever sees half a group.
+                with self.store.batch():
+                    for action, future in jobs:
+                        try:
+                            results.append((future, action()))
+                        except HttpError as e:
+                            results.append((future, (e.status, {"error": str(e)})))
+                        except ValueError as e:
+                            results.append((future, (HTTPStatus.BAD_REQUEST, {"error": str(e)})))
+                        except Exception as e:
+                            # Only this write failed; the rest of the group is still saved
+                            traceback.print_exc()
+                            results.append((future, (HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)})))
+            except Exception as e:
+                # Saving the group failed, so batch() rolled all of it back
+                traceback.print_exc()
+                results = [(future, (HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)})) for _, future in jobs]
+            finally:
+                self.cache.clear()
+            for future, result in results:
+                if not future.done():
+                    future.set_result(result)
+
+    # Picks up changes made by other processes (--shared JSON or SQLite)
+    async def refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.refresh)
+            self.store.refresh()
+            self.cache.clear()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local HTTP/JSON API for the Student Fee Management System")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="port to listen on (default: 8765)")
+    parser.add_argument("--storage", default="json", choices=["json", "sqlite"],
+                        help="storage backend (default: json)")
+    parser.add_argument("--journal", action="store_true",
+                        help="append changes to journal.jsonl instead of rewriting the JSON files")
+    parser.add_argument("--shared", action="store_true",
+                        help="lock the data files so the menu can run alongside the server (implies --journal)")
+    parser.add_argument("--db", default="fees.db", help="SQLite database file (default: fees.db)")
+    parser.add_argument("--refresh", type=float, default=0,
+                        help="seconds between checks for other processes' changes (default: 0, never)")
+    args = parser.parse_args()
+
+    if not os.path.exists(ADMIN_FILE):
+        sys.exit("❌ No admin PIN set. Run student_fee_management_system.py once to create one.")
+    pin = load_data(ADMIN_FILE)["admin_pin"]
+    app = FeeServer(FeeTracker(open_store(args)), pin, args.refresh)
+    try:
+        asyncio.run(app.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        app.store.close()
+        print("Goodbye")
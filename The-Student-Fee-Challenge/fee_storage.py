@@ -0,0 +1,1349 @@
+import json
+import mmap
+import os
+import re
+import sqlite3
+import stat
+import struct
+import sys
+import tempfile
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import date, datetime
+from itertools import count, islice
+from fee_metrics import METRICS, tracked
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# ========== Utility Functions ==========
+
+@tracked("load_data")
+def load_data(filename):
+    if not os.path.exists(filename):
+        return []
+    with open(filename, 'r') as f:
+        data = json.load(f)
+        if METRICS.enabled:
+            METRICS.count_bytes(read=os.fstat(f.fileno()).st_size)
+        return data
+
+# Mode of an existing file, or what open() would give a new one
+def file_mode(filename):
+    try:
+        return stat.S_IMODE(os.stat(filename).st_mode)
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+# Writes to a temporary file next to the target and renames it over the
+# target, so readers only ever see the old or the new file, never a partial one
+def atomic_write(filename, write, mode='w'):
+    fd, tmp = tempfile.mkstemp(prefix=os.path.basename(filename) + '.', suffix='.tmp',
+                               dir=os.path.dirname(os.path.abspath(filename)))
+    try:
+        with os.fdopen(fd, mode) as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+            if METRICS.enabled:
+                METRICS.count_bytes(written=f.tell())
+        # mkstemp makes the file private (0600); keep the mode other users had
+        os.chmod(tmp, file_mode(filename))
+        os.replace(tmp, filename)
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+@tracked("save_data")
+def save_data(filename, data):
+    atomic_write(filename, lambda f: json.dump(data, f, indent=4))
+
+# Same output as save_data for a list of records, but takes any iterable
+# and serialises one record at a time
+@tracked("save_records")
+def save_records(filename, records):
+    def write(f):
+        f.write("[")
+        separator = "\n"
+        for record in records:
+            f.write(separator)
+            f.write("    " + json.dumps(record, indent=4).replace("\n", "\n    "))
+            separator = ",\n"
+        f.write("]" if separator == "\n" else "\n]")
+    atomic_write(filename, write)
+
+# (mtime, size, inode) of a file, or None if it does not exist
+def file_signature(filename):
+    try:
+        st = os.stat(filename)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+# Exclusive advisory lock held for the duration of the with-block
+@contextmanager
+def file_lock(filename):
+    with open(filename, 'a+') as f:
+        if fcntl:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            while True:
+                try:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:  # LK_LOCK gives up after ~10s; keep waiting
+                    time.sleep(0.1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+def payment_number(payment_id):
+    match = re.fullmatch(r"PAY-(\d+)", payment_id)
+    return int(match.group(1)) if match else 0
+
+# Journal: one JSON object per line, appended and fsynced, never rewritten
+
+@tracked("append_journal")
+def append_journal(filename, entries):
+    data = "".join(json.dumps(entry) + "\n" for entry in entries)
+    with open(filename, 'a') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    if METRICS.enabled:
+        METRICS.count_bytes(written=len(data))  # json.dumps output is ASCII
+
+# Returns the entries after byte `offset` and the offset just past the last
+# complete line, so a reader can pick up where it left off
+@tracked("read_journal")
+def read_journal(filename, offset=0):
+    if not os.path.exists(filename):
+        return [], 0
+    entries = []
+    start = offset
+    with open(filename, 'rb') as f:
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b"\n"):
+                break  # torn or still-being-written last line
+            if line.strip():
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    break
+            offset += len(line)
+    if METRICS.enabled:
+        METRICS.count_bytes(read=offset - start)
+    return entries, offset
+
+# ========== Compact Payment Storage ==========
+
+# Payments are held column by column instead of one dict per payment:
+# amounts as a float array, dates as day ordinals, and student IDs as
+# indexes into a table holding each ID string once. Rows are turned back
+# into the usual dicts on demand. Any value the columns cannot reproduce
+# exactly (an int amount, a date not in YYYY-MM-DD form, extra fields) is
+# kept per row in `exceptions`, so JSON -> columns -> JSON is lossless.
+
+PAYMENT_FIELDS = ("payment_id", "student_id", "amount", "date")
+
+def date_ordinal(text):
+    try:
+        return date.fromisoformat(text).toordinal()
+    except (TypeError, ValueError):
+        try:
+            return datetime.strptime(text, "%Y-%m-%d").toordinal()
+        except (TypeError, ValueError):
+            return 0
+
+# A date given as a query bound. Unlike a stored date, which falls back to
+# ordinal 0, a bad one is an error rather than "from the beginning".
+def query_ordinal(text):
+    try:
+        return datetime.strptime(text, "%Y-%m-%d").toordinal()
+    except (TypeError, ValueError):
+        raise ValueError("Dates must be YYYY-MM-DD.")
+
+# The same bound as an ISO string, for comparing with stored date strings
+def query_date(text):
+    return date.fromordinal(query_ordinal(text)).isoformat()
+
+# Running money totals are kept in whole cents, so taking an amount back
+# out (a fee or a student's payments moving) leaves no float residue
+def to_cents(amount):
+    return round(amount * 100)
+
+def from_cents(cents):
+    return cents / 100 if cents else 0
+
+class PaymentColumns:
+    def __init__(self, records=()):
+        self.ids = []
+        self.students = array('l')
+        self.amounts = array('d')
+        self.dates = array('l')
+        self.student_ids = []     # interned student ID table
+        self.student_index = {}   # student ID -> position in student_ids
+        self.exceptions = {}      # row -> {field: original value}
+        for record in records:
+            self.append(record)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __iter__(self):
+        return (self.row(i) for i in range(len(self.ids)))
+
+    def student_row_index(self, student_id):
+        index = self.student_index.get(student_id)
+        if index is None:
+            index = self.student_index[student_id] = len(self.student_ids)
+            self.student_ids.append(student_id)
+        return index
+
+    def append(self, record):
+        i = len(self.ids)
+        amount, when = record["amount"], record["date"]
+        self.ids.append(record["payment_id"])
+        self.students.append(self.student_row_index(record["student_id"]))
+        self.amounts.append(amount)
+        ordinal = date_ordinal(when)
+        self.dates.append(ordinal)
+        odd = {k: v for k, v in record.items() if k not in PAYMENT_FIELDS}
+        if type(amount) is not float:
+            odd["amount"] = amount
+        if ordinal <= 0 or date.fromordinal(ordinal).isoformat() != when:
+            odd["date"] = when
+        if odd:
+            self.exceptions[i] = odd
+        return i
+
+    def student_id(self, i):
+        return self.student_ids[self.students[i]]
+
+    def row(self, i):
+        record = {"payment_id": self.ids[i], "student_id": self.student_ids[self.students[i]],
+                  "amount": self.amounts[i], "date": date.fromordinal(self.dates[i]).isoformat() if self.dates[i] > 0 else None}
+        if i in self.exceptions:
+            record.update(self.exceptions[i])
+        return record
+
+    # Header entries and arrays for write_snapshot, or None if a payment ID
+    # cannot be stored in the newline-separated ids blob
+    def snapshot_parts(self):
+        try:
+            ids = "\n".join(self.ids).encode('utf-8', 'surrogatepass')
+        except TypeError:
+            return None
+        if ids.count(b"\n") != max(len(self.ids) - 1, 0):
+            return None
+        header = {"rows": len(self.ids), "student_ids": self.student_ids,
+                  "exceptions": {str(i): odd for i, odd in self.exceptions.items()}}
+        arrays = {"ids": ids, "students": self.students, "amounts": self.amounts, "dates": self.dates}
+        return header, arrays
+
+    @classmethod
+    def from_snapshot(cls, header, arrays):
+        columns = cls()
+        columns.ids = arrays["ids"].decode('utf-8', 'surrogatepass').split("\n") if header["rows"] else []
+        columns.students = arrays["students"]
+        columns.amounts = arrays["amounts"]
+        columns.dates = arrays["dates"]
+        columns.student_ids = header["student_ids"]
+        columns.student_index = {sid: i for i, sid in enumerate(columns.student_ids)}
+        columns.exceptions = {int(i): odd for i, odd in header["exceptions"].items()}
+        return columns
+
+# ========== Binary Snapshot ==========
+
+# A snapshot file caches one JSON file in binary so that startup does not
+# have to parse it. Layout:
+#   magic, uint32 version, uint32 header length   (SNAPSHOT_PREFIX)
+#   header: JSON with the source file's signature, the column table and
+#           any small tables
+#   columns: raw array bytes, each starting on an 8-byte boundary, so the
+#           file can be memory-mapped and each column copied out in one go
+# A snapshot whose source signature, version or platform does not match is
+# ignored; the caller falls back to the JSON file and writes a new snapshot.
+
+SNAPSHOT_MAGIC = b"FEESNAP\0"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_PREFIX = struct.Struct("<8sII")
+SNAPSHOT_PLATFORM = f"{sys.byteorder}-{array('l').itemsize}"
+
+def aligned(size):
+    return size + (-size) % 8
+
+# arrays maps a column name to an array or to raw bytes
+@tracked("write_snapshot")
+def write_snapshot(filename, source, header, arrays):
+    columns, parts, offset = [], [], 0
+    for name, values in arrays.items():
+        raw = values if isinstance(values, bytes) else values.tobytes()
+        columns.append([name, getattr(values, 'typecode', ''), offset, len(raw)])
+        parts.append(raw)
+        offset += aligned(len(raw))
+    header = dict(header, source=list(source), platform=SNAPSHOT_PLATFORM, columns=columns)
+    encoded = json.dumps(header).encode()
+    start = aligned(SNAPSHOT_PREFIX.size + len(encoded))
+
+    def write(f):
+        f.write(SNAPSHOT_PREFIX.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(encoded)))
+        f.write(encoded)
+        f.write(b"\0" * (start - SNAPSHOT_PREFIX.size - len(encoded)))
+        for raw in parts:
+            f.write(raw)
+            f.write(b"\0" * (aligned(len(raw)) - len(raw)))
+    atomic_write(filename, write, 'wb')
+
+# (header, arrays) if the snapshot exists and was built from a file with
+# the given signature, else None
+@tracked("read_snapshot")
+def read_snapshot(filename, source):
+    try:
+        with open(filename, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            magic, version, size = SNAPSHOT_PREFIX.unpack_from(data)
+            if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+                return None
+            header = json.loads(data[SNAPSHOT_PREFIX.size:SNAPSHOT_PREFIX.size + size])
+            if header["source"] != list(source) or header["platform"] != SNAPSHOT_PLATFORM:
+                return None
+            start = aligned(SNAPSHOT_PREFIX.size + size)
+            arrays = {}
+            for name, typecode, offset, length in header["columns"]:
+                raw = data[start + offset:start + offset + length]
+                if len(raw) != length:
+                    return None  # truncated
+                if typecode:
+                    arrays[name] = array(typecode)
+                    arrays[name].frombytes(raw)
+                else:
+                    arrays[name] = raw
+            if METRICS.enabled:
+                METRICS.count_bytes(read=len(data))
+            return header, arrays
+    except (OSError, ValueError, KeyError, TypeError, struct.error):
+        return None
+
+# ========== Storage Backends ==========
+
+# Every backend stores the same three collections and hands records out as
+# plain dicts shaped like the JSON files. Writes go through commit(op, record)
+# with op one of "student", "delete_student", "fee" or "payment". Inside
+# `with store.batch():` commits are visible to reads straight away but are
+# written to disk together when the block ends. If the block raises, none of
+# its changes are written and the store goes back to what is on disk. A
+# batch() inside another one just joins it.
+
+COLLECTIONS = ("students", "fees", "payments")
+STATUSES = ("Cleared", "Not Cleared", "No Fee Info")
+
+def clearance_status(total_fee, total_paid):
+    if total_fee is None:
+        return "No Fee Info"
+    return "Cleared" if to_cents(total_fee) == to_cents(total_paid) else "Not Cleared"
+
+class StorageBackend:
+    def get_student(self, student_id):
+        raise NotImplementedError
+
+    def iter_students(self):
+        raise NotImplementedError
+
+    def get_fee(self, program, year):
+        raise NotImplementedError
+
+    def iter_fees(self):
+        raise NotImplementedError
+
+    def get_payment(self, payment_id):
+        raise NotImplementedError
+
+    def student_payments(self, student_id):
+        raise NotImplementedError
+
+    def total_paid(self, student_id):
+        raise NotImplementedError
+
+    def payments_on(self, date):
+        return list(self.payments_between(date, date))
+
+    # Payments dated date_from..date_to inclusive (either end may be None),
+    # in date order
+    def payments_between(self, date_from=None, date_to=None, offset=0, limit=None):
+        raise NotImplementedError
+
+    def next_payment_id(self):
+        raise NotImplementedError
+
+    # (student, total_fee or None, total_paid) for every student matching all
+    # the given criteria, in insertion order. program is case-insensitive,
+    # status is one of STATUSES, and paid_from/paid_to keep students with at
+    # least one payment in that date range.
+    def student_balances(self, program=None, campus=None, student_id=None, year=None, status=None,
+                         paid_from=None, paid_to=None, offset=0, limit=None):
+        raise NotImplementedError
+
+    # (program, expected, collected) for every program with a fee structure
+    def program_totals(self):
+        raise NotImplementedError
+
+    # (sum of all fee structures, sum of all payments)
+    def overall_totals(self):
+        raise NotImplementedError
+
+    # (date, campus, program, collected, payments) for every day and
+    # campus/program pair with payments dated date_from..date_to inclusive,
+    # in date order. campus and program are None for payments whose student
+    # no longer exists; program is case-insensitive.
+    def daily_collections(self, date_from=None, date_to=None, campus=None, program=None):
+        raise NotImplementedError
+
+    def iter_records(self, collection):
+        raise NotImplementedError
+
+    def commit(self, op, record):
+        raise NotImplementedError
+
+    @contextmanager
+    def batch(self):
+        raise NotImplementedError
+        yield
+
+    # Picks up changes written by other processes since the last call
+    def refresh(self):
+        pass
+
+    def close(self):
+        pass
+
+# ---------- JSON Files ----------
+
+JOURNAL_COMPACT_EVERY = 1000  # journal entries folded into the snapshot files
+
+# shared=True lets several processes use the same data directory: every
+# write happens under an advisory lock on fees.lock after catching up with
+# the journal, and refresh() replays only what others appended since.
+#
+# Payments are not read at startup. The first operation that needs them
+# calls load_payments(), which reads payments.snap (a binary snapshot of
+# payments.json, written on compaction and on close) or, if that is missing
+# or older than payments.json, parses the JSON and writes a new snapshot on
+# close. Until then journal payments wait in `deferred`. Collection trends
+# come from payment_rollups.json and need no payments at all (see roll-ups).
+
+class JsonStorage(StorageBackend):
+    def __init__(self, journaled=False, shared=False):
+        self.students_file = 'students.json'
+        self.fees_file = 'fees.json'
+        self.payments_file = 'payments.json'
+        self.journal_file = 'journal.jsonl'
+        self.lock_file = 'fees.lock'
+        self.snapshot_file = 'payments.snap'
+        self.rollups_file = 'payment_rollups.json'
+        self.shared = shared
+        self.journaled = journaled or shared
+        self.pending = None  # changes held back by batch()
+        self.holding_lock = False
+
+        if self.shared:
+            with file_lock(self.lock_file):
+                self.load()
+        else:
+            self.load()
+
+    @tracked("JsonStorage.load")
+    def load(self):
+        self.students = load_data(self.students_file)
+        self.fees = load_data(self.fees_file)
+        self.snapshot_signature = self.signature()
+        # student_id -> student, (program, year) -> fee
+        self.students_by_id = {s["student_id"]: s for s in self.students}
+        self.fees_by_key = {(f["program"], f["year"]): f for f in self.fees}
+        self.payments = None  # see load_payments
+        self.deferred = []
+        self.snapshot_current = False
+        self.read_rollups()
+
+        # Snapshot + journal replay; entries are idempotent so a crash
+        # between snapshot write and journal truncation is harmless
+        self.journal_entries = 0
+        self.journal_offset = 0
+        if self.journaled:
+            self.replay_journal()
+
+    def replay_journal(self):
+        entries, self.journal_offset = read_journal(self.journal_file, self.journal_offset)
+        for entry in entries:
+            if entry["op"] == "payment" and self.payments is None:
+                self.deferred.append(entry["record"])
+            else:
+                self.apply_change(entry["op"], entry["record"])
+        self.journal_entries += len(entries)
+
+    # ---------- Lazy Payments ----------
+
+    def load_payments(self):
+        if self.payments is not None:
+            return
+        with METRICS.track("JsonStorage.load_payments"):
+            self.read_payments()
+
+    def read_payments(self):
+        while True:
+            if self.signature() != self.snapshot_signature:
+                self.load()  # another process rewrote the files since load()
+            snapshot = read_snapshot(self.snapshot_file, self.snapshot_signature[2])
+            if snapshot is None:
+                records = load_data(self.payments_file)
+            if self.signature() == self.snapshot_signature:
+                break
+        if snapshot is None:
+            self.payments = PaymentColumns(records)
+            self.build_indexes()
+            self.build_aggregates()
+        else:
+            header, arrays = snapshot
+            self.payments = PaymentColumns.from_snapshot(header, arrays)
+            self.build_indexes(header, arrays)
+            self.build_aggregates(arrays)
+        self.snapshot_current = snapshot is not None
+        deferred, self.deferred = self.deferred, []
+        for record in deferred:
+            self.apply_change("payment", record)
+
+    # Only valid while the in-memory payments match payments.json
+    def save_snapshot(self):
+        source = file_signature(self.payments_file)
+        parts = self.payments.snapshot_parts()
+        if source is None or parts is None:
+            return
+        header, arrays = parts
+        # The indexes and per-student totals go in too, so loading needs no sorting or summing
+        student_ids = self.payments.student_ids
+        counts, by_student = array('l'), array('l')
+        for sid in student_ids:
+            rows = self.payments_by_student.get(sid, ())
+            counts.append(len(rows))
+            by_student.extend(rows)
+        header["payment_seq"] = self.payment_seq
+        arrays.update(by_student=by_student, student_rows=counts,
+                      by_date=self.payments_by_date, payment_dates=self.payment_dates,
+                      paid=array('d', (from_cents(self.paid_by_student.get(sid, 0)) for sid in student_ids)))
+        write_snapshot(self.snapshot_file, source, header, arrays)
+        self.snapshot_current = True
+
+    def signature(self):
+        return tuple(file_signature(f) for f in (self.students_file, self.fees_file, self.payments_file))
+
+    # ---------- Concurrency ----------
+
+    def sync(self):
+        # Snapshots rewritten (another process compacted) or journal cut
+        # short: start over. Otherwise just read the new journal lines.
+        journal_size = os.path.getsize(self.journal_file) if os.path.exists(self.journal_file) else 0
+        if self.signature() != self.snapshot_signature or journal_size < self.journal_offset:
+            self.load()
+        elif journal_size > self.journal_offset:
+            self.replay_journal()
+
+    @contextmanager
+    def locked(self):
+        if not self.shared or self.holding_lock:
+            yield
+            return
+        with file_lock(self.lock_file):
+            self.holding_lock = True
+            try:
+                self.sync()
+                yield
+            finally:
+                self.holding_lock = False
+
+    def refresh(self):
+        with self.locked():
+            pass
+
+    # ---------- Indexes ----------
+
+    # header/arrays come from a snapshot that already holds the indexes
+    def build_indexes(self, header=None, arrays=None):
+        # Payment indexes hold row numbers into self.payments
+        payments = self.payments
+        self.payments_by_id = dict(zip(payments.ids, range(len(payments))))
+        if arrays is not None:
+            self.payment_seq = header["payment_seq"]
+            self.payments_by_student = {}
+            rows, start = arrays["by_student"], 0
+            for sid, n in zip(payments.student_ids, arrays["student_rows"]):
+                if n:
+                    self.payments_by_student[sid] = rows[start:start + n]
+                start += n
+            self.payments_by_date = arrays["by_date"]
+            self.payment_dates = arrays["payment_dates"]
+        else:
+            self.payment_seq = max((payment_number(pid) for pid in payments.ids), default=0)
+            rows_by_student = defaultdict(lambda: array('l'))
+            for i, index in enumerate(payments.students):
+                rows_by_student[index].append(i)
+            self.payments_by_student = {payments.student_ids[index]: rows for index, rows in rows_by_student.items()}
+
+            # Rows sorted by date; payment_dates holds their day ordinals for bisect
+            self.payments_by_date = array('l', sorted(range(len(payments)), key=payments.dates.__getitem__))
+            self.payment_dates = array('l', (payments.dates[i] for i in self.payments_by_date))
+
+        # Secondary student indexes: value -> {student_id: None}, an ordered set.
+        # They are filled by track_student once the aggregates exist.
+        self.student_seq = {}
+        self.next_seq = count()
+        self.ids_by_program = defaultdict(dict)   # lower-cased program
+        self.ids_by_campus = defaultdict(dict)
+        self.ids_by_year = defaultdict(dict)
+        self.ids_by_key = defaultdict(dict)       # (program, year)
+        self.ids_by_status = defaultdict(dict)
+        self.status_by_id = {}
+
+    # ---------- Aggregates ----------
+
+    # Totals are kept up to date by apply_change, so balances and reports
+    # never have to re-sum the payment list (money in cents, see to_cents):
+    #   paid_by_student      student_id -> total paid
+    #   students_per_key     (program, year) -> number of students
+    #   collected_per_key    (program, year) -> total paid by those students
+    #   fees_total / payments_total for the overall summary
+
+    def build_aggregates(self, arrays=None):
+        payments = self.payments
+        rollups, self.rollups = self.rollups, None  # still valid if read from payment_rollups.json
+        if arrays is not None:
+            self.paid_by_student = defaultdict(int, zip(payments.student_ids, map(to_cents, arrays["paid"])))
+        else:
+            paid_by_index = defaultdict(int)
+            for index, amount in zip(payments.students, payments.amounts):
+                paid_by_index[index] += to_cents(amount)
+            self.paid_by_student = defaultdict(int, ((payments.student_ids[index], paid) for index, paid in paid_by_index.items()))
+        self.students_per_key = defaultdict(int)
+        self.collected_per_key = defaultdict(int)
+        for s in self.students:
+            self.track_student(s, 1)
+        self.fees_total = sum(to_cents(f["total_fee"]) for f in self.fees)
+        self.payments_total = sum(map(to_cents, payments.amounts))
+        if rollups is None:
+            self.build_rollups()
+        else:
+            self.rollups = rollups
+
+    # Adds (sign=1) or removes (sign=-1) a student's contribution to the
+    # aggregates and the secondary indexes
+    def track_student(self, student, sign):
+        sid = student["student_id"]
+        key = (student["program"], student["year_of_study"])
+        self.students_per_key[key] += sign
+        self.collected_per_key[key] += sign * self.paid_by_student.get(sid, 0)
+        if self.rollups is not None and sid in self.payments_by_student:
+            if sign > 0:
+                self.move_rollups(sid, (None, None), (student["campus"], student["program"]))
+                self.orphan_ids.discard(sid)
+            else:
+                self.move_rollups(sid, (student["campus"], student["program"]), (None, None))
+                self.orphan_ids.add(sid)
+        indexes = [(self.ids_by_program, student["program"].lower()), (self.ids_by_campus, student["campus"]),
+                   (self.ids_by_year, student["year_of_study"]), (self.ids_by_key, key)]
+        if sign > 0:
+            if sid not in self.student_seq:
+                self.student_seq[sid] = next(self.next_seq)
+            for index, value in indexes:
+                index[value][sid] = None
+            self.refresh_status(sid)
+        else:
+            for index, value in indexes:
+                index[value].pop(sid, None)
+            self.ids_by_status[self.status_by_id.pop(sid)].pop(sid, None)
+
+    def refresh_status(self, student_id):
+        student = self.students_by_id[student_id]
+        fee = self.get_fee(student["program"], student["year_of_study"])
+        status = clearance_status(fee["total_fee"] if fee else None, self.total_paid(student_id))
+        old = self.status_by_id.get(student_id)
+        if old != status:
+            if old is not None:
+                self.ids_by_status[old].pop(student_id, None)
+            self.ids_by_status[status][student_id] = None
+            self.status_by_id[student_id] = status
+
+    # ---------- Collection Roll-ups ----------
+
+    # Collections per day, campus and program, so that trend reports add up a
+    # few thousand totals instead of reading the payment list:
+    #   rollups      day ordinal -> {(campus, program): [cents collected, payments]}
+    #                (None, None) while a payment's student does not exist
+    #   orphan_ids   student IDs of those payments
+    # Like the aggregates they follow each student's current campus and
+    # program. They are saved to payment_rollups.json whenever students.json
+    # or payments.json is written and on close, and read back while those
+    # two files are unchanged, so a report can run without loading payments.
+    # A student change that would move payments made before payments are
+    # loaded drops them (rollups = None); the next read rebuilds them.
+
+    # students.json and payments.json signatures, as kept in the roll-up file
+    @staticmethod
+    def rollup_source(signature):
+        return [list(sig) if sig else None for sig in (signature[0], signature[2])]
+
+    def read_rollups(self):
+        self.rollups, self.orphan_ids, self.rollups_current = None, set(), False
+        try:
+            data = load_data(self.rollups_file)
+            if not isinstance(data, dict) or data["source"] != self.rollup_source(self.snapshot_signature):
+                return
+            rollups = {}
+            for day, campus, program, collected, payments in data["days"]:
+                rollups.setdefault(date_ordinal(day), {})[(campus, program)] = [to_cents(collected), payments]
+            orphan_ids = set(data["orphan_ids"])
+        except (ValueError, KeyError, TypeError):
+            return  # unreadable: rebuilt from the payments when needed
+        self.rollups, self.orphan_ids, self.rollups_current = rollups, orphan_ids, True
+
+    @tracked("JsonStorage.save_rollups")
+    def save_rollups(self):
+        days = []
+        for day in sorted(self.rollups):
+            label = date.fromordinal(day).isoformat() if day > 0 else None
+            days.extend([label, campus, program, from_cents(collected), payments]
+                        for (campus, program), (collected, payments) in self.rollups[day].items())
+        data = {"source": self.rollup_source(self.signature()), "orphan_ids": sorted(self.orphan_ids), "days": days}
+        atomic_write(self.rollups_file, lambda f: json.dump(data, f))
+        self.rollups_current = True
+
+    def build_rollups(self):
+        payments = self.payments
+        keys = []  # (campus, program) per entry of the student ID table
+        for sid in payments.student_ids:
+            student = self.students_by_id.get(sid)
+            keys.append((student["campus"], student["program"]) if student else (None, None))
+        self.rollups = {}
+        for index, day, amount in zip(payments.students, payments.dates, payments.amounts):
+            cell = self.rollups.setdefault(day, {}).setdefault(keys[index], [0, 0])
+            cell[0] += to_cents(amount)
+            cell[1] += 1
+        self.orphan_ids = {sid for sid, key in zip(payments.student_ids, keys) if key == (None, None)}
+        self.rollups_current = False
+
+    def add_rollup(self, day, key, amount, sign):
+        cells = self.rollups.setdefault(day, {})
+        cell = cells.setdefault(key, [0, 0])
+        cell[0] += sign * to_cents(amount)
+        cell[1] += sign
+        if not cell[1]:
+            del cells[key]
+            if not cells:
+                del self.rollups[day]
+        self.rollups_current = False
+
+    def move_rollups(self, student_id, old, new):
+        payments = self.payments
+        for i in self.payments_by_student.get(student_id, ()):
+            self.add_rollup(payments.dates[i], old, payments.amounts[i], -1)
+            self.add_rollup(payments.dates[i], new, payments.amounts[i], 1)
+
+    def load_rollups(self):
+        # Journal payments still waiting are only checked for duplicates
+        # against the payment list, so they need it loaded
+        if self.rollups is None or self.deferred:
+            self.load_payments()
+
+    # ---------- Reads ----------
+
+    def get_student(self, student_id):
+        return self.students_by_id.get(student_id)
+
+    def iter_students(self):
+        return iter(self.students)
+
+    def get_fee(self, program, year):
+        return self.fees_by_key.get((program, year))
+
+    def iter_fees(self):
+        return iter(self.fees)
+
+    def get_payment(self, payment_id):
+        self.load_payments()
+        i = self.payments_by_id.get(payment_id)
+        return None if i is None else self.payments.row(i)
+
+    def student_payments(self, student_id):
+        self.load_payments()
+        return [self.payments.row(i) for i in self.payments_by_student.get(student_id, ())]
+
+    def total_paid(self, student_id):
+        self.load_payments()
+        return from_cents(self.paid_by_student.get(student_id, 0))
+
+    def payments_between(self, date_from=None, date_to=None, offset=0, limit=None):
+        self.load_payments()
+        lo = bisect_left(self.payment_dates, query_ordinal(date_from)) if date_from else 0
+        hi = bisect_right(self.payment_dates, query_ordinal(date_to)) if date_to else len(self.payment_dates)
+        start = lo + offset
+        stop = hi if limit is None else min(hi, start + limit)
+        return (self.payments.row(self.payments_by_date[i]) for i in range(start, stop))
+
+    # Call inside batch() and commit the payment in the same block so that
+    # no other process can take the same number in between
+    def next_payment_id(self):
+        self.load_payments()
+        return f"PAY-{self.payment_seq+1:03}"
+
+    def student_balances(self, program=None, campus=None, student_id=None, year=None, status=None,
+                         paid_from=None, paid_to=None, offset=0, limit=None):
+        self.load_payments()
+        candidates = []
+        if student_id is not None:
+            candidates.append({student_id: None} if student_id in self.students_by_id else {})
+        if program is not None:
+            candidates.append(self.ids_by_program.get(program.lower(), {}))
+        if campus is not None:
+            candidates.append(self.ids_by_campus.get(campus, {}))
+        if year is not None:
+            candidates.append(self.ids_by_year.get(year, {}))
+        if status is not None:
+            candidates.append(self.ids_by_status.get(status, {}))
+        if paid_from or paid_to:
+            lo = bisect_left(self.payment_dates, query_ordinal(paid_from)) if paid_from else 0
+            hi = bisect_right(self.payment_dates, query_ordinal(paid_to)) if paid_to else len(self.payment_dates)
+            student_id_of = self.payments.student_id
+            candidates.append({student_id_of(self.payments_by_date[i]): None for i in range(lo, hi)})
+
+        if candidates:
+            # Walk the smallest index and probe the others
+            candidates.sort(key=len)
+            smallest, others = candidates[0], candidates[1:]
+            ids = [sid for sid in smallest
+                   if sid in self.students_by_id and all(sid in other for other in others)]
+            ids.sort(key=self.student_seq.__getitem__)
+            students = (self.students_by_id[sid] for sid in ids)
+        else:
+            students = iter(self.students)
+        for s in islice(students, offset, None if limit is None else offset + limit):
+            fee = self.get_fee(s["program"], s["year_of_study"])
+            yield s, fee["total_fee"] if fee else None, self.total_paid(s["student_id"])
+
+    def program_totals(self):
+        self.load_payments()
+        programs = list(dict.fromkeys(f["program"] for f in self.fees))
+        expected = dict.fromkeys(programs, 0)
+        collected = dict.fromkeys(programs, 0)
+        # One step per (program, year) pair rather than per student or payment
+        for (program, year), count in self.students_per_key.items():
+            if program not in expected or not count:
+                continue
+            fee = self.get_fee(program, year)
+            if fee:
+                expected[program] += count * to_cents(fee["total_fee"])
+            collected[program] += self.collected_per_key[(program, year)]
+        return [(program, from_cents(expected[program]), from_cents(collected[program])) for program in programs]
+
+    def overall_totals(self):
+        self.load_payments()
+        return from_cents(self.fees_total), from_cents(self.payments_total)
+
+    def daily_collections(self, date_from=None, date_to=None, campus=None, program=None):
+        self.load_rollups()
+        lo = query_ordinal(date_from) if date_from else None
+        hi = query_ordinal(date_to) if date_to else None
+        program = program.lower() if program is not None else None
+        for day in sorted(self.rollups):
+            if (lo is not None and day < lo) or (hi is not None and day > hi):
+                continue
+            label = date.fromordinal(day).isoformat() if day > 0 else None
+            for (s_campus, s_program), (collected, payments) in self.rollups[day].items():
+                if campus is not None and s_campus != campus:
+                    continue
+                if program is not None and (s_program is None or s_program.lower() != program):
+                    continue
+                yield label, s_campus, s_program, from_cents(collected), payments
+
+    def iter_records(self, collection):
+        if collection == "payments":
+            self.load_payments()
+        return iter(getattr(self, collection))
+
+    # ---------- Writes ----------
+
+    # Until payments are loaded only the student and fee lists are kept up
+    # to date; load_payments builds everything else from them
+    def apply_change(self, op, record):
+        loaded = self.payments is not None
+        if op == "student":
+            student = self.get_student(record["student_id"])
+            if student:
+                if loaded:
+                    self.track_student(student, -1)
+                elif (record.get("campus", student["campus"]), record.get("program", student["program"])) != \
+                        (student["campus"], student["program"]):
+                    self.rollups = None  # may move payments; see roll-ups
+                student.update(record)
+            else:
+                if not loaded and record["student_id"] in self.orphan_ids:
+                    self.rollups = None
+                student = dict(record)
+                self.students.append(student)
+                self.students_by_id[student["student_id"]] = student
+            if loaded:
+                self.track_student(student, 1)
+        elif op == "delete_student":
+            student = self.students_by_id.get(record["student_id"])
+            if student:
+                if loaded:
+                    self.track_student(student, -1)
+                    del self.student_seq[student["student_id"]]
+                else:
+                    self.rollups = None
+                del self.students_by_id[student["student_id"]]
+                self.students.remove(student)
+        elif op == "fee":
+            fee = self.get_fee(record["program"], record["year"])
+            if fee:
+                if loaded:
+                    self.fees_total -= to_cents(fee["total_fee"])
+                fee.update(record)
+            else:
+                fee = dict(record)
+                self.fees.append(fee)
+                self.fees_by_key[(fee["program"], fee["year"])] = fee
+            if loaded:
+                self.fees_total += to_cents(fee["total_fee"])
+                for sid in self.ids_by_key.get((fee["program"], fee["year"]), {}):
+                    self.refresh_status(sid)
+        elif op == "payment":
+            self.load_payments()
+            if record["payment_id"] not in self.payments_by_id:
+                row = self.payments.append(record)
+                self.payments_by_id[record["payment_id"]] = row
+                self.payment_seq = max(self.payment_seq, payment_number(record["payment_id"]))
+                self.payments_by_student.setdefault(record["student_id"], array('l')).append(row)
+                ordinal = self.payments.dates[row]
+                i = bisect_right(self.payment_dates, ordinal)
+                self.payment_dates.insert(i, ordinal)
+                self.payments_by_date.insert(i, row)
+                cents = to_cents(record["amount"])
+                self.paid_by_student[record["student_id"]] += cents
+                self.payments_total += cents
+                student = self.get_student(record["student_id"])
+                if student:
+                    self.collected_per_key[(student["program"], student["year_of_study"])] += cents
+                    self.refresh_status(student["student_id"])
+                    self.add_rollup(ordinal, (student["campus"], student["program"]), record["amount"], 1)
+                else:
+                    self.add_rollup(ordinal, (None, None), record["amount"], 1)
+                    self.orphan_ids.add(record["student_id"])
+        else:
+            raise ValueError(f"Unknown journal operation: {op}")
+
+    def persist(self, changes):
+        if self.journaled:
+            append_journal(self.journal_file, [{"op": op, "record": record} for op, record in changes])
+            self.journal_entries += len(changes)
+            self.journal_offset = os.path.getsize(self.journal_file)
+            if self.journal_entries >= JOURNAL_COMPACT_EVERY:
+                self.compact()
+            return
+        ops = set(op for op, _ in changes)
+        if "student" in ops or "delete_student" in ops:
+            save_data(self.students_file, self.students)
+        if "fee" in ops:
+            save_data(self.fees_file, self.fees)
+        if "payment" in ops:
+            save_records(self.payments_file, self.payments)
+            self.snapshot_current = False
+        self.snapshot_signature = self.signature()
+        if ops & {"student", "delete_student", "payment"}:
+            self.rollups_current = False  # saved against the old files
+        if self.rollups is not None and not self.rollups_current:
+            self.save_rollups()
+
+    def commit(self, op, record):
+        if self.pending is not None:
+            self.apply_change(op, record)
+            self.pending.append((op, record))
+            return
+        with self.locked():
+            self.apply_change(op, record)
+            self.persist([(op, record)])
+
+    # The lock (in shared mode) is held for the whole block, so checks made
+    # inside it still hold when the changes are written
+    @contextmanager
+    def batch(self):
+        if self.pending is not None:  # the outer block writes everything
+            yield self
+            return
+        with self.locked():
+            self.pending = []
+            try:
+                yield self
+                changes, self.pending = self.pending, None
+                if changes:
+                    self.persist(changes)
+            except BaseException:
+                # The changes were only applied in memory (or failed to save),
+                # so reading the files again undoes them
+                self.pending = None
+                self.load()
+                raise
+
+    @tracked("JsonStorage.compact")
+    def compact(self):
+        self.load_payments()
+        save_data(self.students_file, self.students)
+        save_data(self.fees_file, self.fees)
+        save_records(self.payments_file, self.payments)
+        self.save_snapshot()
+        self.save_rollups()
+        if self.journaled:
+            open(self.journal_file, 'w').close()
+            self.journal_entries = 0
+            self.journal_offset = 0
+        self.snapshot_signature = self.signature()
+
+    def close(self):
+        with self.locked():
+            if self.journaled and self.journal_entries:
+                self.compact()
+                return
+            if self.payments is not None and not self.snapshot_current:
+                self.save_snapshot()
+            if self.rollups is not None and not self.rollups_current:
+                self.save_rollups()
+
+# ---------- SQLite ----------
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS students (
+    student_id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    program TEXT NOT NULL,
+    campus TEXT NOT NULL,
+    year_of_study INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS fees (
+    program TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    total_fee REAL NOT NULL,
+    PRIMARY KEY (program, year)
+);
+CREATE TABLE IF NOT EXISTS payments (
+    payment_id TEXT PRIMARY KEY,
+    student_id TEXT NOT NULL,
+    amount REAL NOT NULL,
+    date TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sequences (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+-- Collection roll-ups (see JsonStorage); campus and program are '' for
+-- payments whose student does not exist
+CREATE TABLE IF NOT EXISTS daily_collections (
+    date TEXT NOT NULL,
+    campus TEXT NOT NULL,
+    program TEXT NOT NULL,
+    amount_cents INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (date, campus, program)
+);
+CREATE INDEX IF NOT EXISTS idx_students_program_year ON students (program, year_of_study);
+CREATE INDEX IF NOT EXISTS idx_students_program_nocase ON students (program COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_students_campus ON students (campus);
+CREATE INDEX IF NOT EXISTS idx_students_year ON students (year_of_study);
+CREATE INDEX IF NOT EXISTS idx_payments_student ON payments (student_id);
+CREATE INDEX IF NOT EXISTS idx_payments_date ON payments (date);
+"""
+
+STUDENT_UPSERT = """
+INSERT INTO students (student_id, name, program, campus, year_of_study)
+VALUES (:student_id, :name, :program, :campus, :year_of_study)
+ON CONFLICT (student_id) DO UPDATE SET
+    name = excluded.name, program = excluded.program,
+    campus = excluded.campus, year_of_study = excluded.year_of_study
+"""
+FEE_UPSERT = """
+INSERT INTO fees (program, year, total_fee) VALUES (:program, :year, :total_fee)
+ON CONFLICT (program, year) DO UPDATE SET total_fee = excluded.total_fee
+"""
+PAYMENT_INSERT = """
+INSERT OR IGNORE INTO payments (payment_id, student_id, amount, date)
+VALUES (:payment_id, :student_id, :amount, :date)
+"""
+ROLLUP_ADD = """
+INSERT INTO daily_collections (date, campus, program, amount_cents, count) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (date, campus, program) DO UPDATE SET
+    amount_cents = amount_cents + excluded.amount_cents, count = count + excluded.count
+"""
+
+# Several processes can share one database file: WAL lets readers run
+# alongside a writer, and every write is a BEGIN IMMEDIATE transaction.
+
+class SqliteStorage(StorageBackend):
+    def __init__(self, db_file='fees.db'):
+        self.db_file = db_file
+        self.conn = sqlite3.connect(db_file, timeout=30, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        # Money is summed in cents with the same rounding as the JSON backend
+        self.conn.create_function("cents", 1, to_cents, deterministic=True)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.executescript(SQLITE_SCHEMA)
+        self.batching = False
+        if not self.conn.execute("SELECT 1 FROM sequences WHERE name = 'payment'").fetchone():
+            self.sync_sequence()
+        if not self.conn.execute("SELECT 1 FROM sequences WHERE name = 'rollups'").fetchone():
+            self.build_rollups()
+
+    # Moves the payment sequence past every payment ID already stored
+    def sync_sequence(self):
+        highest = max((payment_number(row[0]) for row in self.conn.execute("SELECT payment_id FROM payments")), default=0)
+        with self.transaction():
+            self.conn.execute("INSERT OR IGNORE INTO sequences (name, value) VALUES ('payment', 0)")
+            self.conn.execute("UPDATE sequences SET value = MAX(value, ?) WHERE name = 'payment'", (highest,))
+
+    # Fills daily_collections from the payments, for databases made before
+    # the table existed and after a bulk load; the 'rollups' row marks it done
+    def build_rollups(self):
+        cells = defaultdict(lambda: [0, 0])
+        for day, campus, program, amount in self.conn.execute("""
+                SELECT p.date, COALESCE(s.campus, ''), COALESCE(s.program, ''), p.amount FROM payments p
+                LEFT JOIN students s ON s.student_id = p.student_id"""):
+            cell = cells[(day, campus, program)]
+            cell[0] += to_cents(amount)
+            cell[1] += 1
+        with self.transaction():
+            self.conn.execute("DELETE FROM daily_collections")
+            self.conn.executemany("INSERT INTO daily_collections VALUES (?, ?, ?, ?, ?)",
+                                  (key + tuple(cell) for key, cell in cells.items()))
+            self.conn.execute("INSERT OR REPLACE INTO sequences (name, value) VALUES ('rollups', 1)")
+
+    @contextmanager
+    def transaction(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    def one(self, sql, params=()):
+        row = self.conn.execute(sql, params).fetchone()
+        return dict(row) if row else None
+
+    def rows(self, sql, params=()):
+        return (dict(row) for row in self.conn.execute(sql, params))
+
+    # ---------- Reads ----------
+
+    def get_student(self, student_id):
+        return self.one("SELECT * FROM students WHERE student_id = ?", (student_id,))
+
+    def iter_students(self):
+        return self.rows("SELECT * FROM students ORDER BY rowid")
+
+    def get_fee(self, program, year):
+        return self.one("SELECT * FROM fees WHERE program = ? AND year = ?", (program, year))
+
+    def iter_fees(self):
+        return self.rows("SELECT * FROM fees ORDER BY rowid")
+
+    def get_payment(self, payment_id):
+        return self.one("SELECT * FROM payments WHERE payment_id = ?", (payment_id,))
+
+    def student_payments(self, student_id):
+        return list(self.rows("SELECT * FROM payments WHERE student_id = ? ORDER BY rowid", (student_id,)))
+
+    def total_paid(self, student_id):
+        row = self.conn.execute("SELECT COALESCE(SUM(cents(amount)), 0) FROM payments WHERE student_id = ?", (student_id,)).fetchone()
+        return from_cents(row[0])
+
+    def payments_between(self, date_from=None, date_to=None, offset=0, limit=None):
+        sql = "SELECT * FROM payments WHERE date >= ? AND date <= ? ORDER BY date, rowid LIMIT ? OFFSET ?"
+        # An empty upper bound sorts below every date, so use a high sentinel
+        params = (query_date(date_from) if date_from else "", query_date(date_to) if date_to else "\uffff",
+                  -1 if limit is None else limit, offset)
+        return self.rows(sql, params)
+
+    def next_payment_id(self):
+        value = self.conn.execute("SELECT value FROM sequences WHERE name = 'payment'").fetchone()[0]
+        return f"PAY-{value+1:03}"
+
+    def student_balances(self, program=None, campus=None, student_id=None, year=None, status=None,
+                         paid_from=None, paid_to=None, offset=0, limit=None):
+        where, params = [], []
+        if student_id is not None:
+            where.append("s.student_id = ?")
+            params.append(student_id)
+        if program is not None:
+            where.append("s.program = ? COLLATE NOCASE")
+            params.append(program)
+        if campus is not None:
+            where.append("s.campus = ?")
+            params.append(campus)
+        if year is not None:
+            where.append("s.year_of_study = ?")
+            params.append(year)
+        if paid_from or paid_to:
+            where.append("s.student_id IN (SELECT student_id FROM payments WHERE date >= ? AND date <= ?)")
+            params += [query_date(paid_from) if paid_from else "", query_date(paid_to) if paid_to else "\uffff"]
+        sql = """
+            SELECT s.rowid AS seq, s.student_id, s.name, s.program, s.campus, s.year_of_study, f.total_fee,
+                   (SELECT COALESCE(SUM(cents(p.amount)), 0) FROM payments p WHERE p.student_id = s.student_id) AS paid_cents
+            FROM students s
+            LEFT JOIN fees f ON f.program = s.program AND f.year = s.year_of_study
+        """
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql = f"SELECT * FROM ({sql})"
+        if status == "No Fee Info":
+            sql += " WHERE total_fee IS NULL"
+        elif status == "Cleared":
+            sql += " WHERE total_fee IS NOT NULL AND cents(total_fee) = paid_cents"
+        elif status == "Not Cleared":
+            sql += " WHERE total_fee IS NOT NULL AND cents(total_fee) != paid_cents"
+        elif status is not None:
+            sql += " WHERE 0"
+        sql += " ORDER BY seq LIMIT ? OFFSET ?"
+        params += [-1 if limit is None else limit, offset]
+        for row in self.conn.execute(sql, params):
+            student = {k: row[k] for k in ("student_id", "name", "program", "campus", "year_of_study")}
+            yield student, row["total_fee"], from_cents(row["paid_cents"])
+
+    def program_totals(self):
+        expected = dict(self.conn.execute("""
+            SELECT s.program, SUM(cents(f.total_fee)) FROM students s
+            JOIN fees f ON f.program = s.program AND f.year = s.year_of_study
+            GROUP BY s.program
+        """).fetchall())
+        collected = dict(self.conn.execute("""
+            SELECT s.program, SUM(cents(p.amount)) FROM payments p
+            JOIN students s ON s.student_id = p.student_id
+            GROUP BY s.program
+        """).fetchall())
+        programs = [row[0] for row in self.conn.execute("SELECT program FROM fees GROUP BY program ORDER BY MIN(rowid)")]
+        return [(program, from_cents(expected.get(program, 0)), from_cents(collected.get(program, 0)))
+                for program in programs]
+
+    def overall_totals(self):
+        expected = self.conn.execute("SELECT COALESCE(SUM(cents(total_fee)), 0) FROM fees").fetchone()[0]
+        collected = self.conn.execute("SELECT COALESCE(SUM(cents(amount)), 0) FROM payments").fetchone()[0]
+        return from_cents(expected), from_cents(collected)
+
+    def daily_collections(self, date_from=None, date_to=None, campus=None, program=None):
+        where, params = ["date >= ?", "date <= ?"], [query_date(date_from) if date_from else "",
+                                                     query_date(date_to) if date_to else "\uffff"]
+        if campus is not None:
+            where.append("campus = ?")
+            params.append(campus)
+        if program is not None:
+            where.append("program = ? COLLATE NOCASE")
+            params.append(program)
+        sql = f"""
+            SELECT date, NULLIF(campus, ''), NULLIF(program, ''), amount_cents, count FROM daily_collections
+            WHERE {" AND ".join(where)} ORDER BY date, campus, program
+        """
+        return ((day, campus, program, from_cents(cents), payments)
+                for day, campus, program, cents, payments in self.conn.execute(sql, params))
+
+    def iter_records(self, collection):
+        if collection not in COLLECTIONS:
+            raise ValueError(f"Unknown collection: {collection}")
+        return self.rows(f"SELECT * FROM {collection} ORDER BY rowid")
+
+    # ---------- Writes ----------
+
+    def execute_change(self, op, record):
+        if op == "student":
+            old = self.rollup_key(record["student_id"])
+            self.conn.execute(STUDENT_UPSERT, record)
+            self.move_rollups(record["student_id"], old, self.rollup_key(record["student_id"]))
+        elif op == "delete_student":
+            old = self.rollup_key(record["student_id"])
+            self.conn.execute("DELETE FROM students WHERE student_id = ?", (record["student_id"],))
+            self.move_rollups(record["student_id"], old, ("", ""))
+        elif op == "fee":
+            self.conn.execute(FEE_UPSERT, record)
+        elif op == "payment":
+            if self.conn.execute(PAYMENT_INSERT, record).rowcount:
+                self.conn.execute(ROLLUP_ADD, (record["date"],) + self.rollup_key(record["student_id"]) +
+                                  (to_cents(record["amount"]), 1))
+            self.conn.execute("UPDATE sequences SET value = MAX(value, ?) WHERE name = 'payment'",
+                              (payment_number(record["payment_id"]),))
+        else:
+            raise ValueError(f"Unknown operation: {op}")
+
+    # (campus, program) a student's payments are rolled up under
+    def rollup_key(self, student_id):
+        row = self.conn.execute("SELECT campus, program FROM students WHERE student_id = ?", (student_id,)).fetchone()
+        return tuple(row) if row else ("", "")
+
+    def move_rollups(self, student_id, old, new):
+        if old == new:
+            return
+        cells = defaultdict(lambda: [0, 0])
+        for day, amount in self.conn.execute("SELECT date, amount FROM payments WHERE student_id = ?", (student_id,)):
+            cells[day][0] += to_cents(amount)
+            cells[day][1] += 1
+        for day, (cents, payments) in cells.items():
+            self.conn.execute(ROLLUP_ADD, (day,) + old + (-cents, -payments))
+            self.conn.execute(ROLLUP_ADD, (day,) + new + (cents, payments))
+            self.conn.execute("DELETE FROM daily_collections WHERE date = ? AND campus = ? AND program = ? AND count = 0",
+                              (day,) + old)
+
+    def commit(self, op, record):
+        if self.batching:
+            self.execute_change(op, record)
+            return
+        with self.transaction():
+            self.execute_change(op, record)
+
+    @contextmanager
+    def batch(self):
+        if self.batching:
+            yield self
+            return
+        # One write transaction, taken up front; reads on this connection
+        # already see its rows
+        self.batching = True
+        try:
+            with self.transaction():
+                yield self
+        finally:
+            self.batching = False
+
+    def close(self):
+        self.conn.close()
+
+# ---------- Migration ----------
+
+def migrate_json_to_sqlite(db_file='fees.db'):
+    source = JsonStorage(journaled=True)  # picks up any un-compacted journal entries
+    target = SqliteStorage(db_file)
+    with target.transaction():
+        target.conn.executemany(STUDENT_UPSERT, source.students)
+        target.conn.executemany(FEE_UPSERT, source.fees)
+        target.conn.executemany(PAYMENT_INSERT, source.iter_records("payments"))
+    target.sync_sequence()
+    target.build_rollups()
+    counts = len(source.students), len(source.fees), len(source.payments)
+    target.close()
+    return counts
@@ -1,21 +1,15 @@
-import json
 import os
 import re
 import csv
-from datetime import datetime
+import json
+import sys
+import argparse
+from datetime import date, datetime
+from itertools import chain, islice
 from prettytable import PrettyTable
-
-# ========== Utility Functions ==========
-
-def load_data(filename):
-    if not os.path.exists(filename):
-        return []
-    with open(filename, 'r') as f:
-        return json.load(f)
-
-def save_data(filename, data):
-    with open(filename, 'w') as f:
-        json.dump(data, f, indent=4)
+from fee_storage import (load_data, save_data, JsonStorage, SqliteStorage, migrate_json_to_sqlite,
+                         clearance_status, COLLECTIONS, STATUSES)
+from fee_metrics import METRICS, tracked
 
 # ========== Authentication ==========
 
@@ -59,6 +53,8 @@ def login():
 # ========== Data Classes ==========
 
 class Student:
+    __slots__ = ("student_id", "name", "program", "campus", "year_of_study")
+
     def __init__(self, student_id, name, program, campus, year_of_study):
         self.student_id = student_id
         self.name = name
@@ -67,18 +63,22 @@ class Student:
         self.year_of_study = year_of_study
 
     def to_dict(self):
-        return self.__dict__
+        return {field: getattr(self, field) for field in self.__slots__}
 
 class FeeStructure:
+    __slots__ = ("program", "year", "total_fee")
+
     def __init__(self, program, year, total_fee):
         self.program = program
         self.year = year
         self.total_fee = total_fee
 
     def to_dict(self):
-        return self.__dict__
+        return {field: getattr(self, field) for field in self.__slots__}
 
 class Payment:
+    __slots__ = ("payment_id", "student_id", "amount", "date")
+
     def __init__(self, payment_id, student_id, amount, date):
         self.payment_id = payment_id
         self.student_id = student_id
@@ -86,52 +86,182 @@ class Payment:
         self.date = date
 
     def to_dict(self):
-        return self.__dict__
+        return {field: getattr(self, field) for field in self.__slots__}
+
+# ========== Streaming Output ==========
+
+OUTPUT_FORMATS = ["csv", "jsonl"]
+EXPORT_CHUNK_SIZE = 1000  # rows handed to the writer at a time
+REPORT_PAGE_SIZE = 50     # rows per screen in the terminal view
+
+def chunks(rows, size):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+# Writes dict rows as CSV (header from the first row) or JSON lines, one
+# chunk at a time, so only EXPORT_CHUNK_SIZE rows are ever held in memory
+@tracked("write_rows")
+def write_rows(out, rows, fmt):
+    writer = None
+    count = 0
+    for chunk in chunks(rows, EXPORT_CHUNK_SIZE):
+        if fmt == "csv":
+            if writer is None:
+                writer = csv.DictWriter(out, fieldnames=list(chunk[0].keys()))
+                writer.writeheader()
+            writer.writerows(chunk)
+        else:
+            out.write("".join(json.dumps(row) + "\n" for row in chunk))
+        out.flush()
+        count += len(chunk)
+    return count
+
+# Prints dict rows one PrettyTable page at a time, asking before each next page
+@tracked("show_pages")
+def show_pages(rows, page_size=REPORT_PAGE_SIZE):
+    pages = chunks(rows, page_size)
+    page = next(pages, None)
+    shown = 0
+    while page:
+        table = PrettyTable(list(page[0].keys()))
+        for row in page:
+            table.add_row(list(row.values()))
+        print(table)
+        shown += len(page)
+        page = next(pages, None)
+        if page and input(f"Shown {shown} rows. Press Enter for more, q to stop: ").strip().lower() == 'q':
+            break
+    return shown
+
+# ========== Validation & Import ==========
+
+STUDENT_ID_PATTERN = r"S\d{2}B\d{2}/\d{3}"
+NAME_PATTERN = r"[A-Za-z ]+"
+CAMPUSES = ["Main", "Kampala", "Mbale", "Kabale"]
+IMPORT_KINDS = {"students": "student", "fees": "fee", "payments": "payment"}
+IMPORT_BATCH_SIZE = 1000  # rows written to disk together
+
+def parse_number(value, cast, message):
+    try:
+        return cast(str(value).strip())
+    except (TypeError, ValueError):
+        raise ValueError(message)
+
+# Streams (line number, row dict) from a CSV file with a header row or a
+# JSON-lines file; a malformed JSON line comes through as None
+def read_rows(path):
+    if path.lower().endswith('.csv'):
+        with open(path, 'r', newline='') as f:
+            for line_no, row in enumerate(csv.DictReader(f), start=2):
+                yield line_no, row
+        return
+    with open(path, 'r') as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield line_no, json.loads(line)
+            except json.JSONDecodeError:
+                yield line_no, None
+
+# ========== Query Criteria ==========
+
+def normalize_status(text):
+    for status in STATUSES:
+        if status.lower() == text.strip().lower():
+            return status
+    raise ValueError("Payment status must be Cleared, Not Cleared or No Fee Info.")
+
+def parse_date(text):
+    datetime.strptime(text, "%Y-%m-%d")  # raises ValueError
+    return text
+
+# Turns raw criterion strings (blank or None = not used) into keyword
+# arguments for store.student_balances
+def query_criteria(program=None, campus=None, year=None, status=None, paid_from=None, paid_to=None):
+    criteria = {}
+    if program and program.strip():
+        criteria["program"] = program.strip()
+    if campus and campus.strip():
+        criteria["campus"] = campus.strip().capitalize()
+    if year and str(year).strip():
+        criteria["year"] = parse_number(year, int, "Year must be a whole number.")
+    if status and status.strip():
+        criteria["status"] = normalize_status(status)
+    for key, value in (("paid_from", paid_from), ("paid_to", paid_to)):
+        if value and value.strip():
+            try:
+                criteria[key] = parse_date(value.strip())
+            except ValueError:
+                raise ValueError("Dates must be YYYY-MM-DD.")
+    return criteria
+
+# ========== Collection Trends ==========
+
+TREND_PERIODS = ["day", "week", "month"]
+TREND_BREAKDOWNS = {"none": (False, False), "campus": (True, False), "program": (False, True), "both": (True, True)}
+
+# The day (YYYY-MM-DD), ISO week (YYYY-Www) or month (YYYY-MM) of a payment date
+def period_label(day, period):
+    when = date.fromisoformat(day)
+    if period == "week":
+        year, week, _ = when.isocalendar()
+        return f"{year}-W{week:02}"
+    return when.strftime("%Y-%m") if period == "month" else when.isoformat()
 
 # ========== Core Management Class ==========
 
 class FeeTracker:
-    def __init__(self):
-        self.students_file = 'students.json'
-        self.fees_file = 'fees.json'
-        self.payments_file = 'payments.json'
-
-        self.students = load_data(self.students_file)
-        self.fees = load_data(self.fees_file)
-        self.payments = load_data(self.payments_file)
+    def __init__(self, store=None):
+        self.store = store if store is not None else JsonStorage()
 
     # ---------- Student Management ----------
 
     def add_student(self):
         while True:
             student_id = input("Enter Student ID (format S00B00/000): ").strip()
-            if not re.fullmatch(r"S\d{2}B\d{2}/\d{3}", student_id):
+            if not re.fullmatch(STUDENT_ID_PATTERN, student_id):
                 print("❌ Invalid ID format. Example: S00B00/000")
                 continue
+            if self.store.get_student(student_id):
+                print("❌ Student ID already exists.")
+                return
             break
 
         while True:
             name = input("Enter Name: ").strip()
-            if not re.fullmatch(r"[A-Za-z ]+", name):
+            if not re.fullmatch(NAME_PATTERN, name):
                 print("❌ Name must contain letters only.")
                 continue
             break
 
         program = input("Enter Program: ").strip()
         campus = input("Enter Campus (Main, Kampala, Mbale, Kabale): ").capitalize()
-        if campus not in ["Main", "Kampala", "Mbale", "Kabale"]:
+        if campus not in CAMPUSES:
             print("❌ Invalid campus. Try again.")
             return
         year = int(input("Enter Year of Study: "))
 
-        student = Student(student_id, name, program, campus, year)
-        self.students.append(student.to_dict())
-        save_data(self.students_file, self.students)
+        # Re-checked under the store's write lock in case another terminal
+        # added the same ID meanwhile
+        with self.store.batch():
+            try:
+                record = self.check_student({"student_id": student_id, "name": name, "program": program,
+                                             "campus": campus, "year_of_study": year})
+            except ValueError as e:
+                print(f"❌ {e}")
+                return
+            self.store.commit("student", record)
         print("✅ Student added successfully.")
 
     def edit_student(self):
         sid = input("Enter Student ID to edit: ").strip()
-        student = next((s for s in self.students if s["student_id"] == sid), None)
+        student = self.store.get_student(sid)
         if not student:
             print("❌ Student not found.")
             return
@@ -140,27 +270,25 @@ class FeeTracker:
         program = input(f"Program [{student['program']}]: ") or student['program']
         campus = input(f"Campus [{student['campus']}]: ") or student['campus']
         year = input(f"Year [{student['year_of_study']}]: ") or student['year_of_study']
-        student.update({"name": name, "program": program, "campus": campus, "year_of_study": int(year)})
-        save_data(self.students_file, self.students)
+        self.store.commit("student", {"student_id": sid, "name": name, "program": program, "campus": campus, "year_of_study": int(year)})
         print("✅ Student updated successfully.")
 
     def delete_student(self):
         sid = input("Enter Student ID to delete: ").strip()
-        student = next((s for s in self.students if s["student_id"] == sid), None)
+        student = self.store.get_student(sid)
         if not student:
             print("❌ Student not found.")
             return
-        self.students.remove(student)
-        save_data(self.students_file, self.students)
+        self.store.commit("delete_student", {"student_id": sid})
         print("✅ Student deleted successfully.")
 
     def view_students(self):
-        if not self.students:
-            print("No students found.")
-            return
         table = PrettyTable(["ID", "Name", "Program", "Campus", "Year"])
-        for s in self.students:
+        for s in self.store.iter_students():
             table.add_row([s["student_id"], s["name"], s["program"], s["campus"], s["year_of_study"]])
+        if not table.rows:
+            print("No students found.")
+            return
         print(table)
 
     # ---------- Fee Structure ----------
@@ -172,40 +300,33 @@ class FeeTracker:
         if total_fee < 0:
             print("❌ Invalid value. Fee cannot be negative.")
             return
-        for f in self.fees:
-            if f["program"] == program and f["year"] == year:
-                f["total_fee"] = total_fee
-                break
-        else:
-            fee = FeeStructure(program, year, total_fee)
-            self.fees.append(fee.to_dict())
-        save_data(self.fees_file, self.fees)
+        self.store.commit("fee", FeeStructure(program, year, total_fee).to_dict())
         print("✅ Fee structure saved successfully.")
 
     def view_fee_structures(self):
-        if not self.fees:
-            print("No fee structures defined.")
-            return
         table = PrettyTable(["Program", "Year", "Total Fee"])
-        for f in self.fees:
+        for f in self.store.iter_fees():
             table.add_row([f["program"], f["year"], f["total_fee"]])
+        if not table.rows:
+            print("No fee structures defined.")
+            return
         print(table)
 
     # ---------- Payment Management ----------
 
     def record_payment(self):
         student_id = input("Enter Student ID: ").strip()
-        student = next((s for s in self.students if s["student_id"] == student_id), None)
+        student = self.store.get_student(student_id)
         if not student:
             print("❌ Student not found.")
             return
 
-        fee = next((f for f in self.fees if f["program"] == student["program"] and f["year"] == student["year_of_study"]), None)
+        fee = self.store.get_fee(student["program"], student["year_of_study"])
         if not fee:
             print("❌ Fee structure not defined for this program/year.")
             return
 
-        total_paid = sum(p["amount"] for p in self.payments if p["student_id"] == student_id)
+        total_paid = self.store.total_paid(student_id)
         balance = fee["total_fee"] - total_paid
 
         amount = float(input(f"Enter Payment Amount (Balance due {balance:.2f}): "))
@@ -216,115 +337,217 @@ class FeeTracker:
             print(f"❌ Payment exceeds balance. You still owe {balance:.2f}")
             return
 
-        payment_id = f"PAY-{len(self.payments)+1:03}"
-        date = datetime.now().strftime("%Y-%m-%d")
-        payment = Payment(payment_id, student_id, amount, date)
-        self.payments.append(payment.to_dict())
-        save_data(self.payments_file, self.payments)
-        print(f"✅ Payment recorded successfully. Payment ID: {payment_id}, Date: {date}")
+        # Balance check and ID allocation are repeated under the store's
+        # write lock so parallel terminals cannot overpay or reuse an ID
+        with self.store.batch():
+            try:
+                payment = self.check_payment({"student_id": student_id, "amount": amount})
+            except ValueError as e:
+                print(f"❌ {e}")
+                return
+            self.store.commit("payment", payment)
+        print(f"✅ Payment recorded successfully. Payment ID: {payment['payment_id']}, Date: {payment['date']}")
 
     # ---------- Reports ----------
 
-    def compute_student_balance(self, student):
-        fee = next((f for f in self.fees if f["program"] == student["program"] and f["year"] == student["year_of_study"]), None)
-        if not fee:
+    @staticmethod
+    def balance_status(total_fee, total_paid):
+        if total_fee is None:
             return 0, 0, "No Fee Info", "No Fee Info"
-        total_fee = fee["total_fee"]
-        total_paid = sum(p["amount"] for p in self.payments if p["student_id"] == student["student_id"])
-        balance = total_fee - total_paid
-        status = "Cleared" if balance == 0 else "Not Cleared"
-        return total_fee, total_paid, balance, status
+        return total_fee, total_paid, total_fee - total_paid, clearance_status(total_fee, total_paid)
 
+    def compute_student_balance(self, student):
+        fee = self.store.get_fee(student["program"], student["year_of_study"])
+        total_fee = fee["total_fee"] if fee else None
+        return self.balance_status(total_fee, self.store.total_paid(student["student_id"]))
+
+    # balances yields (student, total_fee or None, total_paid) rows
+    def student_report_rows(self, balances, with_payments=True):
+        for s, fee_total, paid in balances:
+            total_fee, total_paid, balance, status = self.balance_status(fee_total, paid)
+            row = {"Name": s["name"], "Program": s["program"], "Campus": s["campus"], "Total Fee": total_fee,
+                   "Paid": total_paid, "Balance": balance, "Status": status}
+            if with_payments:
+                student_payments = self.store.student_payments(s["student_id"])
+                row["Payment IDs"] = ", ".join(p["payment_id"] for p in student_payments) if student_payments else "N/A"
+                row["Payment Dates"] = ", ".join(p["date"] for p in student_payments) if student_payments else "N/A"
+            yield row
+
+    @tracked("report_per_student")
     def report_per_student(self):
-        table = PrettyTable(["Name", "Program", "Campus", "Total Fee", "Paid", "Balance", "Status", "Payment IDs", "Payment Dates"])
-        for s in self.students:
-            total_fee, total_paid, balance, status = self.compute_student_balance(s)
-            student_payments = [p for p in self.payments if p["student_id"] == s["student_id"]]
-            payment_ids = ", ".join(p["payment_id"] for p in student_payments) if student_payments else "N/A"
-            payment_dates = ", ".join(p["date"] for p in student_payments) if student_payments else "N/A"
-            table.add_row([s["name"], s["program"], s["campus"], total_fee, total_paid, balance, status, payment_ids, payment_dates])
-        print(table)
-
+        if not show_pages(self.student_report_rows(self.store.student_balances())):
+            print("No students found.")
 
+    @tracked("report_per_program")
     def report_per_program(self):
-        programs = set(f["program"] for f in self.fees)
         table = PrettyTable(["Program", "Total Expected Income", "Total Collected", "Outstanding Balance"])
-        for program in programs:
-            students = [s for s in self.students if s["program"] == program]
-            expected = sum(next(f["total_fee"] for f in self.fees if f["program"] == program and f["year"] == s["year_of_study"]) for s in students)
-            collected = sum(p["amount"] for p in self.payments if any(s["student_id"] == p["student_id"] for s in students))
+        for program, expected, collected in self.store.program_totals():
             outstanding = expected - collected
             table.add_row([program, expected, collected, outstanding])
         print(table)
 
+    @tracked("report_overall_summary")
     def report_overall_summary(self):
-        total_expected = sum(f["total_fee"] for f in self.fees)
-        total_collected = sum(p["amount"] for p in self.payments)
+        total_expected, total_collected = self.store.overall_totals()
         total_outstanding = total_expected - total_collected
         table = PrettyTable(["Total Expected Income", "Total Collected", "Outstanding Balance"])
         table.add_row([total_expected, total_collected, total_outstanding])
         print(table)
 
+    # ---------- Collection Trends ----------
+
+    # Collections per period, added up from the store's daily roll-ups
+    # (never the payment list). by_campus / by_program give each campus
+    # and/or program its own rows. Change is against the group's previous
+    # period with payments; Cumulative is the group's running total.
+    def collection_rows(self, period="month", by_campus=False, by_program=False, cumulative=False,
+                        campus=None, program=None, date_from=None, date_to=None):
+        totals, labels = {}, {}
+        for day, s_campus, s_program, collected, payments in self.store.daily_collections(date_from, date_to,
+                                                                                           campus, program):
+            if day not in labels:
+                try:
+                    labels[day] = period_label(day, period)
+                except (TypeError, ValueError):
+                    labels[day] = None  # no usable date, so in no period
+            if labels[day] is None:
+                continue
+            key = (labels[day], s_campus if by_campus else "", s_program if by_program else "")
+            cell = totals.setdefault(key, [0, 0])
+            cell[0] += collected
+            cell[1] += payments
+        previous, running = {}, {}
+        for key in sorted(totals, key=lambda k: (k[0], k[1] or "", k[2] or "")):
+            label, s_campus, s_program = key
+            collected, payments = totals[key]
+            group = (s_campus, s_program)
+            row = {"Period": label}
+            if by_campus:
+                row["Campus"] = s_campus or "Unknown"
+            if by_program:
+                row["Program"] = s_program or "Unknown"
+            row["Payments"] = payments
+            row["Collected"] = round(collected, 2)
+            if cumulative:
+                running[group] = running.get(group, 0) + collected
+                row["Cumulative"] = round(running[group], 2)
+            else:
+                row["Change"] = round(collected - previous[group], 2) if group in previous else "N/A"
+                previous[group] = collected
+            yield row
+
+    # Prompts shared by both trend reports; None if an answer is invalid
+    def ask_collection_options(self):
+        period = input("Period (day/week/month) [month]: ").strip().lower() or "month"
+        if period not in TREND_PERIODS:
+            print("❌ Period must be day, week or month.")
+            return None
+        breakdown = input("Break down by (none/campus/program/both) [none]: ").strip().lower() or "none"
+        if breakdown not in TREND_BREAKDOWNS:
+            print("❌ Break down by none, campus, program or both.")
+            return None
+        try:
+            criteria = query_criteria(campus=input("Campus (blank for all): "),
+                                      program=input("Program (blank for all): "),
+                                      paid_from=input("From (YYYY-MM-DD, blank for start): "),
+                                      paid_to=input("To (YYYY-MM-DD, blank for end): "))
+        except ValueError as e:
+            print(f"❌ {e}")
+            return None
+        by_campus, by_program = TREND_BREAKDOWNS[breakdown]
+        return dict(period=period, by_campus=by_campus, by_program=by_program, campus=criteria.get("campus"),
+                    program=criteria.get("program"), date_from=criteria.get("paid_from"),
+                    date_to=criteria.get("paid_to"))
+
+    @tracked("report_collection_trend")
+    def report_collection_trend(self):
+        options = self.ask_collection_options()
+        if options and not show_pages(self.collection_rows(**options)):
+            print("No payments found.")
+
+    @tracked("report_cumulative_collections")
+    def report_cumulative_collections(self):
+        options = self.ask_collection_options()
+        if options and not show_pages(self.collection_rows(cumulative=True, **options)):
+            print("No payments found.")
+
     # ---------- Search / Filter ----------
 
+    @tracked("filter_records")
     def filter_records(self):
         print("Filter Options:")
         print("1) Program\n2) Campus\n3) Payment Status\n4) Student ID\n5) Payment ID\n6) Payment Date")
-        choice = input("Choose filter (1-6): ").strip()
+        print("7) Combined Query\n8) Payment Date Range")
+        choice = input("Choose filter (1-8): ").strip()
 
         if choice == '1':
             program = input("Enter Program: ")
-            filtered = [s for s in self.students if s["program"].lower() == program.lower()]
-            self.report_per_student_filtered(filtered)
+            self.report_per_student_filtered(self.store.student_balances(program=program))
         elif choice == '2':
             campus = input("Enter Campus: ").capitalize()
-            filtered = [s for s in self.students if s["campus"] == campus]
-            self.report_per_student_filtered(filtered)
+            self.report_per_student_filtered(self.store.student_balances(campus=campus))
         elif choice == '3':
-            status = input("Enter Payment Status (Cleared/Not Cleared): ").capitalize()
-            filtered = [s for s in self.students if self.compute_student_balance(s)[3] == status]
-            self.report_per_student_filtered(filtered)
+            try:
+                status = normalize_status(input("Enter Payment Status (Cleared/Not Cleared): "))
+            except ValueError as e:
+                print(f"❌ {e}")
+                return
+            self.report_per_student_filtered(self.store.student_balances(status=status))
         elif choice == '4':
             sid = input("Enter Student ID: ")
-            filtered = [s for s in self.students if s["student_id"] == sid]
-            self.report_per_student_filtered(filtered)
+            self.report_per_student_filtered(self.store.student_balances(student_id=sid))
         elif choice == '5':
             pid = input("Enter Payment ID: ")
-            filtered = [p for p in self.payments if p["payment_id"] == pid]
-            if not filtered:
-                print("No payment found.")
-                return
-            table = PrettyTable(["Payment ID", "Student ID", "Amount", "Date"])
-            for p in filtered:
-                table.add_row([p["payment_id"], p["student_id"], p["amount"], p["date"]])
-            print(table)
+            payment = self.store.get_payment(pid)
+            self.report_payments_filtered([payment] if payment else [])
         elif choice == '6':
             date_filter = input("Enter Payment Date (YYYY-MM-DD): ")
-            filtered = [p for p in self.payments if p["date"] == date_filter]
-            if not filtered:
-                print("No payment found.")
+            try:
+                payments = self.store.payments_on(date_filter.strip())
+            except ValueError as e:
+                print(f"❌ {e}")
+                return
+            self.report_payments_filtered(payments)
+        elif choice == '7':
+            print("All entered criteria must match. Leave blank to skip.")
+            try:
+                criteria = query_criteria(
+                    program=input("Program: "),
+                    campus=input("Campus: "),
+                    year=input("Year of Study: "),
+                    status=input("Payment Status (Cleared/Not Cleared/No Fee Info): "),
+                    paid_from=input("Paid on or after (YYYY-MM-DD): "),
+                    paid_to=input("Paid on or before (YYYY-MM-DD): "))
+            except ValueError as e:
+                print(f"❌ {e}")
                 return
-            table = PrettyTable(["Payment ID", "Student ID", "Amount", "Date"])
-            for p in filtered:
-                table.add_row([p["payment_id"], p["student_id"], p["amount"], p["date"]])
-            print(table)
+            self.report_per_student_filtered(self.store.student_balances(**criteria))
+        elif choice == '8':
+            try:
+                criteria = query_criteria(paid_from=input("From (YYYY-MM-DD, blank for start): "),
+                                          paid_to=input("To (YYYY-MM-DD, blank for end): "))
+            except ValueError as e:
+                print(f"❌ {e}")
+                return
+            self.report_payments_filtered(self.store.payments_between(criteria.get("paid_from"), criteria.get("paid_to")))
         else:
             print("❌ Invalid choice.")
 
     def report_per_student_filtered(self, filtered):
-        if not filtered:
+        if not show_pages(self.student_report_rows(filtered, with_payments=False)):
             print("No records found.")
-            return
-        table = PrettyTable(["Name", "Program", "Campus", "Total Fee", "Paid", "Balance", "Status"])
-        for s in filtered:
-            total_fee, total_paid, balance, status = self.compute_student_balance(s)
-            table.add_row([s["name"], s["program"], s["campus"], total_fee, total_paid, balance, status])
-        print(table)
+
+    def report_payments_filtered(self, payments):
+        rows = ({"Payment ID": p["payment_id"], "Student ID": p["student_id"], "Amount": p["amount"], "Date": p["date"]}
+                for p in payments)
+        if not show_pages(rows):
+            print("No payment found.")
 
     # ---------- Export Data ----------
 
+    @tracked("export_data")
     def export_data(self):
-        files = [self.students_file, self.fees_file, self.payments_file]
+        files = [f"{name}.json" for name in COLLECTIONS]
         print("\nAvailable JSON files:")
         for f in files:
             print(f"- {f}")
@@ -332,16 +555,143 @@ class FeeTracker:
         if filename not in files:
             print("❌ File not found.")
             return
-        data = load_data(filename)
-        if not data:
+        fmt = input("Format (csv/jsonl) [csv]: ").strip().lower() or "csv"
+        if fmt not in OUTPUT_FORMATS:
+            print("❌ Invalid format.")
+            return
+        records = self.store.iter_records(filename[:-len('.json')])
+        first = next(records, None)
+        if first is None:
             print("❌ No data to export.")
             return
-        csv_file = filename.replace('.json', '.csv')
-        with open(csv_file, 'w', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=data[0].keys())
-            writer.writeheader()
-            writer.writerows(data)
-        print(f"✅ Data exported successfully to {csv_file}")
+        out_file = filename.replace('.json', f'.{fmt}')
+        with open(out_file, 'w', newline='') as f:
+            count = write_rows(f, chain([first], records), fmt)
+        print(f"✅ {count} records exported successfully to {out_file}")
+
+    # ---------- Bulk Import ----------
+
+    # check_* apply the same rules as the interactive prompts and return the
+    # record to store, or raise ValueError with the reason for rejecting it
+
+    # existing=True checks an edit of a stored student instead of a new one
+    def check_student(self, row, existing=False):
+        student_id = str(row.get("student_id") or "").strip()
+        if not re.fullmatch(STUDENT_ID_PATTERN, student_id):
+            raise ValueError("Invalid ID format. Example: S00B00/000")
+        if existing and not self.store.get_student(student_id):
+            raise ValueError("Student not found.")
+        if not existing and self.store.get_student(student_id):
+            raise ValueError("Student ID already exists.")
+        name = str(row.get("name") or "").strip()
+        if not re.fullmatch(NAME_PATTERN, name):
+            raise ValueError("Name must contain letters only.")
+        program = str(row.get("program") or "").strip()
+        if not program:
+            raise ValueError("Program is required.")
+        campus = str(row.get("campus") or "").strip().capitalize()
+        if campus not in CAMPUSES:
+            raise ValueError("Invalid campus.")
+        year = parse_number(row.get("year_of_study"), int, "Year of study must be a whole number.")
+        return Student(student_id, name, program, campus, year).to_dict()
+
+    def check_fee(self, row):
+        program = str(row.get("program") or "").strip()
+        if not program:
+            raise ValueError("Program is required.")
+        year = parse_number(row.get("year"), int, "Year must be a whole number.")
+        total_fee = parse_number(row.get("total_fee"), float, "Total fee must be a number.")
+        if total_fee < 0:
+            raise ValueError("Invalid value. Fee cannot be negative.")
+        return FeeStructure(program, year, total_fee).to_dict()
+
+    def check_payment(self, row):
+        student_id = str(row.get("student_id") or "").strip()
+        student = self.store.get_student(student_id)
+        if not student:
+            raise ValueError("Student not found.")
+        fee = self.store.get_fee(student["program"], student["year_of_study"])
+        if not fee:
+            raise ValueError("Fee structure not defined for this program/year.")
+        amount = parse_number(row.get("amount"), float, "Amount must be a number.")
+        if amount < 0:
+            raise ValueError("Invalid amount. Cannot be negative.")
+        balance = fee["total_fee"] - self.store.total_paid(student_id)
+        if amount > balance:
+            raise ValueError(f"Payment exceeds balance. Student still owes {balance:.2f}")
+        date = str(row.get("date") or "").strip() or datetime.now().strftime("%Y-%m-%d")
+        try:
+            date = datetime.strptime(date, "%Y-%m-%d").strftime("%Y-%m-%d")
+        except ValueError:
+            raise ValueError("Date must be YYYY-MM-DD.")
+        # Payment IDs are always allocated here, never taken from the file
+        return Payment(self.store.next_payment_id(), student_id, amount, date).to_dict()
+
+    @tracked("import_file")
+    def import_file(self, kind, path, batch_size=IMPORT_BATCH_SIZE):
+        op = IMPORT_KINDS[kind]
+        check = getattr(self, f"check_{op}")
+        accepted, rejected = 0, []
+        rows = read_rows(path)
+        while True:
+            chunk = list(islice(rows, batch_size))
+            if not chunk:
+                break
+            with self.store.batch():
+                for line_no, row in chunk:
+                    if not isinstance(row, dict):
+                        rejected.append((line_no, "Malformed row."))
+                        continue
+                    try:
+                        record = check(row)
+                    except ValueError as e:
+                        rejected.append((line_no, str(e)))
+                        continue
+                    self.store.commit(op, record)
+                    accepted += 1
+        return accepted, rejected
+
+    def bulk_import(self, kind=None, path=None):
+        kind = kind or input("Import what? (students/fees/payments): ").strip().lower()
+        if kind not in IMPORT_KINDS:
+            print("❌ Invalid choice.")
+            return
+        path = path or input("Enter CSV or JSON-lines file path: ").strip()
+        if not os.path.exists(path):
+            print("❌ File not found.")
+            return
+        accepted, rejected = self.import_file(kind, path)
+        print(f"✅ Imported {accepted} {kind} from {path}.")
+        if rejected:
+            print(f"❌ Rejected {len(rejected)} rows:")
+            for line_no, reason in rejected[:20]:
+                print(f"  line {line_no}: {reason}")
+            if len(rejected) > 20:
+                rejects_file = path + '.rejected.csv'
+                with open(rejects_file, 'w', newline='') as f:
+                    writer = csv.writer(f)
+                    writer.writerow(["line", "reason"])
+                    writer.writerows(rejected)
+                print(f"  ... and {len(rejected) - 20} more, all listed in {rejects_file}")
+
+    # ---------- Performance Stats ----------
+
+    def show_stats(self):
+        if not METRICS.enabled:
+            print("Metrics are off. Start the program with --metrics to collect them.")
+            return
+        table = PrettyTable(["Operation", "Calls", "Busy (s)", "Input Wait (s)", "Bytes Read", "Bytes Written"])
+        for name, stats in METRICS.rows():
+            table.add_row([name, stats["calls"], f"{stats['busy']:.4f}", f"{stats['input_wait']:.2f}",
+                           stats["bytes_read"], stats["bytes_written"]])
+        print(table)
+        print("Busy = wall time minus time spent waiting at prompts; nested operations count towards their callers.")
+        if METRICS.profile_file:
+            print(f"cProfile of {METRICS.profile_name} saved to {METRICS.profile_file} (python -m pstats {METRICS.profile_file})")
+        filename = input("Save metrics as JSON to (blank to skip): ").strip()
+        if filename:
+            METRICS.dump(filename)
+            print(f"✅ Metrics saved to {filename}")
 
     # ---------- Main Menu ----------
 
@@ -352,40 +702,146 @@ class FeeTracker:
 
         while True:
             print("\n===== STUDENT FEE MANAGEMENT SYSTEM =====")
-            print("1. Add Student")
-            print("2. Edit Student")
-            print("3. Delete Student")
-            print("4. View Students")
-            print("5. Define Fee Structure")
-            print("6. View Fee Structures")
-            print("7. Record Payment")
-            print("8. Report Per Student")
-            print("9. Report Per Program")
-            print("10. Overall Summary")
-            print("11. Filter/Search Records")
-            print("12. Export Data")
-            print("0. Exit")
+            for key, label in MENU_ACTIONS.items():
+                print(f"{key}. {label}")
 
             choice = input("Enter choice: ").strip()
-            if choice == '1': self.add_student()
-            elif choice == '2': self.edit_student()
-            elif choice == '3': self.delete_student()
-            elif choice == '4': self.view_students()
-            elif choice == '5': self.define_fee_structure()
-            elif choice == '6': self.view_fee_structures()
-            elif choice == '7': self.record_payment()
-            elif choice == '8': self.report_per_student()
-            elif choice == '9': self.report_per_program()
-            elif choice == '10': self.report_overall_summary()
-            elif choice == '11': self.filter_records()
-            elif choice == '12': self.export_data()
-            elif choice == '0':
-                print("Goodbye")
-                break
-            else:
-                print("❌ Invalid option. Try again.")
+            with METRICS.track(f"menu: {MENU_ACTIONS.get(choice, 'Invalid')}"):
+                self.store.refresh()  # pick up other terminals' changes
+                if choice == '1': self.add_student()
+                elif choice == '2': self.edit_student()
+                elif choice == '3': self.delete_student()
+                elif choice == '4': self.view_students()
+                elif choice == '5': self.define_fee_structure()
+                elif choice == '6': self.view_fee_structures()
+                elif choice == '7': self.record_payment()
+                elif choice == '8': self.report_per_student()
+                elif choice == '9': self.report_per_program()
+                elif choice == '10': self.report_overall_summary()
+                elif choice == '11': self.filter_records()
+                elif choice == '12': self.export_data()
+                elif choice == '13': self.bulk_import()
+                elif choice == '14': self.show_stats()
+                elif choice == '15': self.report_collection_trend()
+                elif choice == '16': self.report_cumulative_collections()
+                elif choice == '0':
+                    self.store.close()
+                    print("Goodbye")
+                    break
+                else:
+                    print("❌ Invalid option. Try again.")
+
+MENU_ACTIONS = {"1": "Add Student", "2": "Edit Student", "3": "Delete Student", "4": "View Students",
+                "5": "Define Fee Structure", "6": "View Fee Structures", "7": "Record Payment",
+                "8": "Report Per Student", "9": "Report Per Program", "10": "Overall Summary",
+                "11": "Filter/Search Records", "12": "Export Data", "13": "Bulk Import",
+                "14": "Performance Stats", "15": "Collection Trend", "16": "Cumulative Collections",
+                "0": "Exit"}
 
 # Run Application
+def open_store(args):
+    if args.storage == "sqlite":
+        return SqliteStorage(args.db)
+    return JsonStorage(journaled=args.journal, shared=args.shared)
+
 if __name__ == "__main__":
-    app = FeeTracker()
-    app.run()
+    parser = argparse.ArgumentParser(description="Student Fee Management System")
+    parser.add_argument("--storage", default="json", choices=["json", "sqlite"],
+                        help="storage backend (default: json)")
+    parser.add_argument("--journal", action="store_true",
+                        help="append changes to journal.jsonl instead of rewriting the JSON files")
+    parser.add_argument("--shared", action="store_true",
+                        help="lock the data files so several terminals can use them at once (implies --journal)")
+    parser.add_argument("--db", default="fees.db", help="SQLite database file (default: fees.db)")
+    parser.add_argument("--metrics", action="store_true",
+                        help="time every menu action, load/save and report (see menu 14)")
+    parser.add_argument("--metrics-file", help="write the collected metrics as JSON to this file on exit (implies --metrics)")
+    parser.add_argument("--profile", metavar="OPERATION",
+                        help='capture a cProfile of the first run of one operation, e.g. "menu: Report Per Student" '
+                             'or report_per_program (implies --metrics)')
+    commands = parser.add_subparsers(dest="command")
+    commands.add_parser("run", help="open the interactive menu (default)")
+    commands.add_parser("migrate", help="copy the JSON files into the SQLite database")
+    import_parser = commands.add_parser("import", help="bulk-load a CSV or JSON-lines file")
+    import_parser.add_argument("kind", choices=list(IMPORT_KINDS))
+    import_parser.add_argument("file")
+    import_parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE,
+                               help=f"rows written per batch (default: {IMPORT_BATCH_SIZE})")
+    export_parser = commands.add_parser("export", help="stream a collection to CSV or JSON lines")
+    export_parser.add_argument("collection", choices=list(COLLECTIONS))
+    report_parser = commands.add_parser("report", help="stream the per-student report to CSV or JSON lines")
+    query_parser = commands.add_parser("query", help="students matching all the given criteria")
+    query_parser.add_argument("--program")
+    query_parser.add_argument("--campus")
+    query_parser.add_argument("--year")
+    query_parser.add_argument("--status", help="Cleared, Not Cleared or No Fee Info")
+    query_parser.add_argument("--paid-from", help="has a payment on or after YYYY-MM-DD")
+    query_parser.add_argument("--paid-to", help="has a payment on or before YYYY-MM-DD")
+    query_parser.add_argument("--offset", type=int, default=0, help="rows to skip")
+    query_parser.add_argument("--limit", type=int, help="rows to return (page size)")
+    trend_parser = commands.add_parser("trend", help="collections per day, week or month, from the roll-ups")
+    trend_parser.add_argument("--period", default="month", choices=TREND_PERIODS)
+    trend_parser.add_argument("--by", action="append", choices=["campus", "program"], default=[],
+                              help="give each campus or program its own rows (repeatable)")
+    trend_parser.add_argument("--campus")
+    trend_parser.add_argument("--program")
+    trend_parser.add_argument("--from", dest="date_from", help="payments on or after YYYY-MM-DD")
+    trend_parser.add_argument("--to", dest="date_to", help="payments on or before YYYY-MM-DD")
+    trend_parser.add_argument("--cumulative", action="store_true", help="running totals instead of changes")
+    for sub in (export_parser, report_parser, query_parser, trend_parser):
+        sub.add_argument("--format", default="csv", choices=OUTPUT_FORMATS)
+        sub.add_argument("--output", default="-", help="output file (default: - for stdout)")
+    args = parser.parse_args()
+    if args.metrics or args.metrics_file or args.profile:
+        METRICS.enable(profile=args.profile)
+
+    if args.command == "migrate":
+        students, fees, payments = migrate_json_to_sqlite(args.db)
+        print(f"✅ Migrated {students} students, {fees} fee structures and {payments} payments to {args.db}")
+    elif args.command == "import":
+        if args.batch_size < 1:
+            parser.error("--batch-size must be at least 1")
+        app = FeeTracker(open_store(args))
+        accepted, rejected = app.import_file(args.kind, args.file, args.batch_size)
+        app.store.close()
+        print(f"✅ Imported {accepted} {args.kind} from {args.file}.")
+        for line_no, reason in rejected:
+            print(f"❌ line {line_no}: {reason}")
+    elif args.command in ("export", "report", "query", "trend"):
+        if args.command == "query":
+            try:
+                criteria = query_criteria(args.program, args.campus, args.year, args.status, args.paid_from, args.paid_to)
+            except ValueError as e:
+                parser.error(str(e))
+        elif args.command == "trend":
+            try:
+                criteria = query_criteria(program=args.program, campus=args.campus,
+                                          paid_from=args.date_from, paid_to=args.date_to)
+            except ValueError as e:
+                parser.error(str(e))
+        app = FeeTracker(open_store(args))
+        if args.command == "export":
+            rows = app.store.iter_records(args.collection)
+        elif args.command == "query":
+            balances = app.store.student_balances(offset=args.offset, limit=args.limit, **criteria)
+            rows = app.student_report_rows(balances, with_payments=False)
+        elif args.command == "trend":
+            rows = app.collection_rows(args.period, "campus" in args.by, "program" in args.by, args.cumulative,
+                                       criteria.get("campus"), criteria.get("program"),
+                                       criteria.get("paid_from"), criteria.get("paid_to"))
+        else:
+            rows = app.student_report_rows(app.store.student_balances())
+        if args.output == "-":
+            write_rows(sys.stdout, rows, args.format)
+        else:
+            with open(args.output, 'w', newline='') as f:
+                count = write_rows(f, rows, args.format)
+            print(f"✅ {count} rows written to {args.output}")
+        app.store.close()
+    else:
+        app = FeeTracker(open_store(args))
+        app.run()
+    if args.metrics_file:
+        METRICS.dump(args.metrics_file)
+    if METRICS.profile_file:
+        print(f"cProfile of {args.profile} saved to {METRICS.profile_file}", file=sys.stderr)